@@ -0,0 +1,169 @@
+#! python3
+"""
+bench_scaling.py - measures how every pipeline stage scales with the size of the wiki.
+
+For each data type, synthetic payloads (see synthetic.py) at several multiples of today's catalogue size
+are pushed through the same stages as a real scrape: cleaning up the API result, converting it to
+the AHK format and writing the output file. Time and peak memory are recorded per stage and scale,
+and the growth exponent between consecutive scales is reported. An exponent clearly above 1 means
+the stage is super-linear, and it is flagged.
+
+	python benchmarks/bench_scaling.py								uniques, cards, gems and maps at 1x, 10x and 100x
+	python benchmarks/bench_scaling.py uniques --scales 10 100 1000
+	python benchmarks/bench_scaling.py --no-memory					skip the (slower) tracemalloc pass
+	python benchmarks/bench_scaling.py uniques --processes 4		convert the uniques in 4 processes
+"""
+
+import argparse, contextlib, io, math, os, sys, tempfile, time, tracemalloc
+
+BENCHDIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHDIR)
+sys.path.insert(0, os.path.dirname(BENCHDIR))
+
+import synthetic
+from scrape_poe_info import cards, gems, maps, uniques
+
+NOISE_FLOOR = 0.02
+"""
+stages faster than this many seconds (at either of two scales) are too noisy to judge their growth.
+"""
+
+REPEAT = 3
+"""
+each pipeline is timed this many times and the fastest time of each stage is kept.
+"""
+
+
+def render_to_tempdir(module):
+	def render(lines):
+		with tempfile.TemporaryDirectory() as output_dir:
+			module.render(lines, output_dir)
+		return lines
+	return render
+
+
+def parse_map_pages(map_list):
+	import bs4
+
+	data = []
+	for map_info in map_list:
+		page = synthetic.map_page(map_info['name'], ['Card ' + str(map_info['count'] % 37), 'The Wolf'])
+		data.append(maps.build_data(bs4.BeautifulSoup(page, 'html.parser'), map_info))
+	return data
+
+
+def pipeline(data_type, processes=1):
+	"""
+	returns the stages of data_type as a list of (name, function), each function taking the previous stage's result
+	"""
+	if data_type == 'gem_levels':
+		def render_levels(table):
+			with tempfile.TemporaryDirectory() as output_dir:
+				gems.render_levels(table, output_dir)
+			return table
+		return [
+			('ingest_levels', lambda payload: gems.ingest_levels(gems.LevelTable(), payload['cargoquery'])),
+			('render_levels', render_levels),
+		]
+	if data_type == 'maps':
+		return [
+			('parse_main_page', maps.parse_main_page),
+			('build_data', parse_map_pages),
+			('convert_data_to_AHK_readable_format', maps.convert_data_to_AHK_readable_format),
+			('render', render_to_tempdir(maps)),
+		]
+	module = {'uniques': uniques, 'cards': cards, 'gems': gems}[data_type]
+	convert = module.convert_to_AHK_script_format
+	if data_type == 'uniques':
+		convert = lambda item_list: uniques.convert_to_AHK_script_format(item_list, processes)
+	return [
+		('clean_up_api_results', lambda payload: module.clean_up_api_results(payload['cargoquery'])),
+		('convert_to_AHK_script_format', convert),
+		('render', render_to_tempdir(module)),
+	]
+
+
+def run_pipeline(stages, payload, trace_memory):
+	"""
+	returns a list of (seconds, peak bytes) per stage; peak bytes is None without trace_memory
+	"""
+	results = []
+	value = payload
+	for name, stage in stages:
+		if trace_memory:
+			tracemalloc.start()
+		start = time.perf_counter()
+		with contextlib.redirect_stdout(io.StringIO()):		# the stages print progress and warnings
+			value = stage(value)
+		elapsed = time.perf_counter() - start
+		peak = None
+		if trace_memory:
+			peak = tracemalloc.get_traced_memory()[1]
+			tracemalloc.stop()
+		results.append((elapsed, peak))
+	return results
+
+
+def best_timings(stages, payload, repeat):
+	"""
+	the fastest time of each stage over repeat runs of the pipeline
+	"""
+	runs = [run_pipeline(stages, payload, False) for _ in range(repeat)]
+	return [min(run[index][0] for run in runs) for index in range(len(stages))]
+
+
+def growth_exponent(small_scale, small_time, large_scale, large_time):
+	if small_time < NOISE_FLOOR or large_time < NOISE_FLOOR:
+		return None
+	return math.log(large_time / small_time) / math.log(large_scale / small_scale)
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Measures time and peak memory of each pipeline stage against catalogue size.')
+	parser.add_argument('data_types', nargs='*', default=list(synthetic.GENERATORS), help='data types to measure (default: all)')
+	parser.add_argument('--scales', nargs='+', type=float, default=[1, 10, 100], help="multiples of today's catalogue size (default: 1 10 100)")
+	parser.add_argument('--no-memory', action='store_true', help='do not measure peak memory')
+	parser.add_argument('--repeat', type=int, default=REPEAT, help='time every stage this many times and keep the fastest (default: {})'.format(REPEAT))
+	parser.add_argument('--processes', type=int, default=1, help='worker processes for the uniques conversion (default: 1)')
+	parser.add_argument('--max-exponent', type=float, default=1.2, help='growth exponents above this are flagged as super-linear (default: 1.2)')
+	args = parser.parse_args(argv)
+
+	scales = sorted(args.scales)
+	flagged = []
+	print('{:<9} {:<38} {:>8} {:>9} {:>10} {:>10} {:>9}'.format('type', 'stage', 'scale', 'entries', 'seconds', 'peak MiB', 'exponent'))
+	for data_type in args.data_types:
+		stages = pipeline(data_type, args.processes)
+		previous = None
+		for scale in scales:
+			size = synthetic.scaled_size(data_type, scale)
+			payload = synthetic.GENERATORS[data_type](size)
+			timings = best_timings(stages, payload, max(1, args.repeat))
+			if not args.no_memory:
+				peaks = [peak for _, peak in run_pipeline(stages, payload, True)]
+			else:
+				peaks = [None] * len(stages)
+
+			for index, (name, _) in enumerate(stages):
+				seconds = timings[index]
+				exponent = None
+				if previous is not None:
+					exponent = growth_exponent(previous[0], previous[1][index], scale, seconds)
+				mark = ''
+				if exponent is not None and exponent > args.max_exponent:
+					mark = '  SUPER-LINEAR'
+					flagged.append('{} {}: time grows with exponent {:.2f} between {}x and {}x'.format(data_type, name, exponent, previous[0], scale))
+				print('{:<9} {:<38} {:>7}x {:>9} {:>10.3f} {:>10} {:>9}{}'.format(
+					data_type, name, scale, size, seconds,
+					'-' if peaks[index] is None else '{:.1f}'.format(peaks[index] / 2**20),
+					'-' if exponent is None else '{:.2f}'.format(exponent),
+					mark))
+			previous = (scale, timings)
+
+	if flagged:
+		print('\n' + '\n'.join(flagged))
+		return 1
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
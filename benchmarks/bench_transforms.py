@@ -0,0 +1,218 @@
+#! python3
+"""
+bench_transforms.py - micro-benchmarks for the transform hot paths, run over recorded wiki payloads.
+
+Every case reports ops/sec and the peak memory allocated by one call, and compares its output
+byte for byte with the golden file in benchmarks/golden. A case fails if its output drifted,
+or if it got slower than --max-slowdown times the baseline stored with --save-baseline.
+
+	python benchmarks/bench_transforms.py						run all cases
+	python benchmarks/bench_transforms.py separate_num		run the cases whose name contains "separate_num"
+	python benchmarks/bench_transforms.py --update-golden		accept the current output as golden
+	python benchmarks/bench_transforms.py --save-baseline		store the ops/sec of this machine as baseline
+
+The fixtures in benchmarks/fixtures are cargo API responses and a map article, in the format the wiki returns them.
+"""
+
+import argparse, contextlib, io, json, os, sys, time, tracemalloc
+
+BENCHDIR = os.path.dirname(os.path.abspath(__file__))
+FIXTUREDIR = os.path.join(BENCHDIR, 'fixtures')
+GOLDENDIR = os.path.join(BENCHDIR, 'golden')
+BASELINE_FILE = os.path.join(BENCHDIR, 'baseline.json')
+
+sys.path.insert(0, os.path.dirname(BENCHDIR))
+
+from scrape_poe_info import cards, gems, maps, uniques
+
+
+def load_fixture(name):
+	with open(os.path.join(FIXTUREDIR, name), 'r', encoding='utf-8') as f:
+		if name.endswith('.json'):
+			return json.load(f)
+		return f.read()
+
+
+class Case(object):
+	"""
+	One benchmark: func is called with the prepared args, its result is compared to golden/<name>.txt
+	"""
+
+	def __init__(self, name, func, args, encoding='utf-8'):
+		self.name = name
+		self.func = func
+		self.args = args
+		self.encoding = encoding
+
+	def run(self):
+		with contextlib.redirect_stdout(io.StringIO()):		# the transforms print progress and warnings
+			return self.func(*self.args)
+
+	def serialize(self, result):
+		if isinstance(result, list) and all(isinstance(line, str) for line in result):
+			text = '\n'.join(result) + '\n'
+		else:
+			text = json.dumps(result, indent='\t', sort_keys=True, ensure_ascii=False) + '\n'
+		return text.encode(self.encoding)
+
+
+def batch(func):
+	"""
+	turns a function of one value into one that maps it over a list of recorded values
+	"""
+	def run(values):
+		return [func(value) for value in values]
+	return run
+
+
+def build_cases():
+	unique_items = uniques.clean_up_api_results(load_fixture('uniques_cargo.json')['cargoquery'])
+	card_results = load_fixture('cards_cargo.json')['cargoquery']
+	card_list = cards.clean_up_api_results(card_results)
+	gem_list = gems.clean_up_api_results(load_fixture('gems_cargo.json')['cargoquery'])
+	map_list = load_fixture('maps.json')
+
+	raw_unique_fields = []
+	for result in load_fixture('uniques_cargo.json')['cargoquery']:
+		raw_unique_fields.append(result['title']['implicit stat text'])
+		raw_unique_fields.append(result['title']['explicit stat text'])
+
+	mod_lists = []
+	for item in unique_items:
+		for mods in (item['impl'], item['expl']):
+			if mods:
+				mod_lists.append(uniques.remove_hidden_mods(mods.split('<br>')))
+
+	area_ids = []
+	for card in card_list:
+		area_ids.extend(card['dropareas'] or [])
+
+	cases = [
+		Case('uniques.separate_num_ranges', batch(uniques.separate_num_ranges), (mod_lists,)),
+		Case('uniques.remove_wiki_formats', batch(uniques.remove_wiki_formats), (raw_unique_fields,)),
+		Case('uniques.convert_to_AHK_script_format', uniques.convert_to_AHK_script_format, (unique_items,), 'cp1252'),
+		Case('uniques.name_aliases', lambda item_list: [[item.name] + uniques.name_aliases(item) for item in uniques.build_items(item_list)], (unique_items,)),
+		Case('cards.convert_areaID_to_mapname', batch(cards.convert_areaID_to_mapname), (area_ids,)),
+		Case('cards.remove_wiki_formats_droptext', batch(cards.remove_wiki_formats_droptext), ([r['title']['drop text'] for r in card_results],)),
+		Case('cards.convert_to_AHK_script_format', cards.convert_to_AHK_script_format, (card_list,), 'cp1252'),
+		Case('gems.separate_num', batch(gems.separate_num), ([gem['qtext'] for gem in gem_list],)),
+		Case('gems.convert_to_AHK_script_format', gems.convert_to_AHK_script_format, (gem_list,), 'cp1252'),
+		Case('maps.convert_data_to_AHK_readable_format', maps.convert_data_to_AHK_readable_format, (map_list,), 'cp1252'),
+	]
+
+	try:
+		import bs4
+	except ImportError:
+		print('bs4 is not installed, skipping maps.build_data')
+	else:
+		soup = bs4.BeautifulSoup(load_fixture('map_page.html'), 'html.parser')
+		spider_lair = [m for m in map_list if m['name'] == 'Spider Lair'][0]
+		cases.append(Case('maps.build_data', maps.build_data, (soup, spider_lair)))
+
+	return cases
+
+
+def measure_speed(case, min_time):
+	"""
+	returns ops/sec, calling the case in growing batches until a batch takes at least min_time seconds
+	"""
+	number = 1
+	while True:
+		start = time.perf_counter()
+		for _ in range(number):
+			case.run()
+		elapsed = time.perf_counter() - start
+		if elapsed >= min_time:
+			return number / elapsed
+		number *= 2 if elapsed < min_time / 10 else 1 + int(min_time / max(elapsed, 1e-9))
+
+
+def measure_allocations(case):
+	"""
+	returns the peak number of bytes allocated during one call, and the number of memory blocks it left behind
+	"""
+	tracemalloc.start()
+	before = tracemalloc.take_snapshot()
+	if hasattr(tracemalloc, 'reset_peak'):		# Python 3.9+; before, the peak also counts the snapshot
+		tracemalloc.reset_peak()
+	base = tracemalloc.get_traced_memory()[0]
+	result = case.run()
+	peak = tracemalloc.get_traced_memory()[1] - base
+	after = tracemalloc.take_snapshot()
+	tracemalloc.stop()
+	blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+	del result
+	return peak, blocks
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Benchmarks the transform functions over recorded wiki payloads.')
+	parser.add_argument('filter', nargs='?', default='', help='only run cases whose name contains this text')
+	parser.add_argument('--min-time', type=float, default=0.2, help='seconds to spend timing each case (default: 0.2)')
+	parser.add_argument('--update-golden', action='store_true', help='write the current output as the golden files')
+	parser.add_argument('--save-baseline', action='store_true', help='store the measured ops/sec as the baseline for this machine')
+	parser.add_argument('--max-slowdown', type=float, default=1.25, help='fail if a case is this many times slower than the baseline (default: 1.25)')
+	args = parser.parse_args(argv)
+
+	baseline = {}
+	if os.path.exists(BASELINE_FILE):
+		with open(BASELINE_FILE, 'r') as f:
+			baseline = json.load(f)
+
+	failures = []
+	speeds = {}
+	print('{:<45} {:>12} {:>12} {:>8} {}'.format('case', 'ops/sec', 'peak KiB', 'blocks', 'output'))
+	for case in build_cases():
+		if args.filter not in case.name:
+			continue
+
+		output = case.serialize(case.run())
+		golden_path = os.path.join(GOLDENDIR, case.name + '.txt')
+		if args.update_golden:
+			with open(golden_path, 'wb') as f:
+				f.write(output)
+			status = 'updated'
+		elif not os.path.exists(golden_path):
+			status = 'NO GOLDEN FILE'
+			failures.append(case.name + ': missing golden file, run with --update-golden')
+		else:
+			with open(golden_path, 'rb') as f:
+				golden = f.read()
+			if golden == output:
+				status = 'ok'
+			else:
+				status = 'DRIFT'
+				failures.append(case.name + ': output differs from ' + golden_path + first_difference(golden, output))
+
+		ops = measure_speed(case, args.min_time)
+		speeds[case.name] = ops
+		peak, blocks = measure_allocations(case)
+		if case.name in baseline and ops * args.max_slowdown < baseline[case.name]:
+			status += ', SLOWER ({:.0f} ops/sec in baseline)'.format(baseline[case.name])
+			failures.append('{}: {:.0f} ops/sec, baseline is {:.0f}'.format(case.name, ops, baseline[case.name]))
+
+		print('{:<45} {:>12.0f} {:>12.1f} {:>8} {}'.format(case.name, ops, peak / 1024, blocks, status))
+
+	if args.save_baseline:
+		baseline.update(speeds)
+		with open(BASELINE_FILE, 'w') as f:
+			json.dump(baseline, f, indent='\t', sort_keys=True)
+		print('\nBaseline written to ' + BASELINE_FILE)
+
+	if failures:
+		print('\n' + '\n'.join(failures))
+		return 1
+	return 0
+
+
+def first_difference(golden, output):
+	golden_lines = golden.split(b'\n')
+	output_lines = output.split(b'\n')
+	for number, (expected, actual) in enumerate(zip(golden_lines, output_lines), 1):
+		if expected != actual:
+			return '\n  line {}:\n  golden: {!r}\n  output: {!r}'.format(number, expected, actual)
+	return '\n  golden has {} lines, output has {}'.format(len(golden_lines), len(output_lines))
+
+
+if __name__ == '__main__':
+	sys.exit(main())
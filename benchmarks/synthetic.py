@@ -0,0 +1,194 @@
+#! python3
+"""
+synthetic.py - generates synthetic wiki payloads of any size, for the scaling benchmarks.
+
+The output has the same shape as the real cargo API responses and map pages (see benchmarks/fixtures),
+with names, mods and drop locations drawn from small vocabularies, so that a catalogue of any size
+can be produced without touching the wiki. The same seed always gives the same payload.
+
+	python benchmarks/synthetic.py uniques 100 > uniques_100x.json		(100 times today's number of uniques)
+"""
+
+import json, random, sys
+
+TODAY = {
+	'uniques': 1100,
+	'cards': 400,
+	'gems': 600,
+	'maps': 180,
+	'gem_levels': 24000,
+}
+"""
+roughly how many entries the wiki has for each data type today; scale factors are relative to these.
+"""
+
+BR = '&lt;br&gt;'
+
+WORDS = ['Blood', 'Storm', 'Void', 'Ash', 'Iron', 'Dream', 'Grave', 'Sun', 'Frost', 'Hollow', 'Crown', 'Thorn', 'Ember', 'Silk', 'Bone', 'Star']
+SUFFIXES = ['fang', 'heart', 'song', 'grip', 'ward', 'call', 'veil', 'spire', 'mark', 'crest']
+ATTRIBUTES = ['[[Strength]]', '[[Dexterity]]', '[[Intelligence]]', 'all [[Attributes]]']
+RESISTANCES = ['[[Fire Resistance]]', '[[Cold Resistance]]', '[[Lightning Resistance]]', '[[Chaos Resistance]]']
+ELEMENTS = ['Fire', 'Cold', 'Lightning', 'Physical', 'Chaos']
+STATIC_MODS = [
+	'Has no Sockets',
+	'Cannot be [[Frozen]]',
+	'Your hits can\'t be Evaded',
+	'Deal no Elemental Damage',
+	'&lt;em class=&quot;tc -corrupted&quot;&gt;Corrupted&lt;/em&gt;',
+	'&amp;#60;Frenzy Charge&amp;#62; bonus',
+]
+STYLE_VARIANTS = ["Atziri's Splendour", "Doryani's Invitation", 'Combat Focus']
+AREAS = ['Area:MapWorldsBurialChambers', 'Area:MapWorldsMazeUnique', 'Area:MapWorldsAtollUnique', 'Area:MapWorldsMoonTempleUnique', 'The Ledge', 'Shrine Map (Atlas of Worlds)']
+TILESETS = ['Cave', 'Crypt', 'Temple', 'Town', 'Jungle', 'Library']
+
+
+def make_name(rng, index, words=2):
+	# the index keeps names unique at any size, like the wiki's page names
+	parts = [rng.choice(WORDS) + rng.choice(SUFFIXES) for _ in range(words)]
+	return ' '.join(parts) + ' ' + str(index)
+
+
+def random_range(rng, low, high):
+	a = rng.randint(low, high)
+	return '({}-{})'.format(a, a + rng.randint(1, high))
+
+
+def random_mod(rng):
+	kind = rng.randrange(6)
+	if kind == 0:
+		return '+' + random_range(rng, 10, 60) + ' to ' + rng.choice(ATTRIBUTES)
+	if kind == 1:
+		return '+' + random_range(rng, 10, 40) + '% to ' + rng.choice(RESISTANCES)
+	if kind == 2:
+		return 'Adds ' + random_range(rng, 5, 20) + ' to ' + random_range(rng, 30, 60) + ' [[' + rng.choice(ELEMENTS) + ' Damage]]'
+	if kind == 3:
+		return random_range(rng, 20, 200) + '% increased [[' + rng.choice(ELEMENTS) + ' Damage]]'
+	if kind == 4:
+		return rng.choice(STATIC_MODS)
+	return 'Enemies take {}% increased Damage (Hidden)'.format(rng.randint(1, 20))
+
+
+def uniques_cargo(size, seed=0):
+	"""
+	a cargo 'items' response with size unique items
+	"""
+	rng = random.Random(seed)
+	results = []
+	for index in range(size):
+		if rng.random() < 0.01:
+			name = rng.choice(STYLE_VARIANTS)
+		else:
+			name = make_name(rng, index)
+		impl = [random_mod(rng) for _ in range(rng.choice([0, 0, 1, 1, 1, 2]))]
+		expl = [random_mod(rng) for _ in range(rng.randint(2, 8))]
+		results.append({'title': {'name': name, 'implicit stat text': BR.join(impl), 'explicit stat text': BR.join(expl)}})
+	return {'cargoquery': results}
+
+
+def cards_cargo(size, seed=0):
+	"""
+	a cargo 'items' response with size divination cards
+	"""
+	rng = random.Random(seed)
+	results = []
+	for index in range(size):
+		areas = rng.sample(AREAS, rng.randint(0, 4))
+		drop_text = ', '.join('[[' + make_name(rng, index, 1) + ']]' for _ in range(rng.choice([0, 0, 1, 2])))
+		results.append({'title': {
+			'name': make_name(rng, index),
+			'drop areas html': ' • '.join('[[' + area + ']]' for area in areas),
+			'drop text': drop_text,
+		}})
+	return {'cargoquery': results}
+
+
+def gems_cargo(size, seed=0):
+	"""
+	a cargo 'skill' response with size gems
+	"""
+	rng = random.Random(seed)
+	results = []
+	for index in range(size):
+		stats = []
+		for _ in range(rng.randint(1, 3)):
+			stats.append('{}% increased {} Damage'.format(rng.choice(['0.5', '1', '1.5', '2']), rng.choice(ELEMENTS)))
+		name = make_name(rng, index) + (' Support' if rng.random() < 0.4 else '')
+		results.append({'title': {'name': name, 'quality stat text': BR.join(stats)}})
+	return {'cargoquery': results}
+
+
+def gem_levels_cargo(size, seed=0):
+	"""
+	a cargo 'skill_levels' response with size rows, 20 to 40 levels per gem, ordered by gem and level
+	"""
+	rng = random.Random(seed)
+	results = []
+	index = 0
+	while len(results) < size:
+		name = make_name(rng, index) + (' Support' if rng.random() < 0.4 else '')
+		mana = rng.randint(4, 12)
+		for level in range(1, min(rng.randint(20, 40), size - len(results)) + 1):
+			results.append({'title': {
+				'name': name,
+				'level': str(level),
+				'level requirement': str(min(100, level * 3)),
+				'experience': str(int(1.3 ** level * 500)) if level < 20 else '',
+				'mana cost': str(mana + level // 2),
+				'critical strike chance': '6' if index % 3 else '',
+				'damage effectiveness': str(100 + level * 2) if index % 3 else '',
+			}})
+		index += 1
+	return {'cargoquery': results}
+
+
+def maps_main_page(size, seed=0):
+	"""
+	the html of User:ARTyficial/MapData with size maps, about a tenth of them unique
+	"""
+	rng = random.Random(seed)
+	normal = ['<table class="wikitable sortable"><tr><th>Tier</th><th>Level</th><th>Name</th><th>Produced by</th><th>Upgrades to</th><th>Tileset</th></tr>']
+	unique = ['<table class="wikitable sortable"><tr><th>Tier</th><th>Level</th><th>Name</th><th>Base</th><th>Tileset</th></tr>']
+	names = [make_name(rng, index) for index in range(size)]
+	for index, name in enumerate(names):
+		tier = rng.randint(1, 16)
+		cells = [str(tier), str(67 + tier), name]
+		if index % 10 == 9:
+			cells += [rng.choice(names), rng.choice(TILESETS)]
+			unique.append('<tr>' + ''.join('<td>' + cell + '</td>' for cell in cells) + '</tr>')
+		else:
+			cells += [rng.choice(names) + ';' + rng.choice(names), rng.choice(names), rng.choice(TILESETS)]
+			normal.append('<tr>' + ''.join('<td>' + cell + '</td>' for cell in cells) + '</tr>')
+	return '<html><body>' + '\n'.join(normal) + '</table>\n' + '\n'.join(unique) + '</table></body></html>'
+
+
+def map_page(name, divcards):
+	"""
+	the html of a single map article with the given divination cards in its item table
+	"""
+	rows = ''.join('<tr><td><span class="divicard-header">' + card + '</span></td></tr>' for card in divcards)
+	return ('<html><body><h1>' + name + ' Map</h1><p>Some text about the map.</p>'
+		'<h2><span class="mw-headline" id="Items_found_in_this_area">Items found in this area</span></h2>'
+		'<table class="wikitable">' + rows + '</table></body></html>')
+
+
+def scaled_size(data_type, scale):
+	return max(1, int(TODAY[data_type] * scale))
+
+
+GENERATORS = {
+	'uniques': uniques_cargo,
+	'cards': cards_cargo,
+	'gems': gems_cargo,
+	'maps': maps_main_page,
+	'gem_levels': gem_levels_cargo,
+}
+
+
+if __name__ == '__main__':
+	if len(sys.argv) != 3 or sys.argv[1] not in GENERATORS:
+		sys.exit('usage: synthetic.py {' + ','.join(GENERATORS) + '} SCALE')
+	payload = GENERATORS[sys.argv[1]](scaled_size(sys.argv[1], float(sys.argv[2])))
+	if isinstance(payload, str):
+		sys.stdout.write(payload)
+	else:
+		json.dump(payload, sys.stdout)
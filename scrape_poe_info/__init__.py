@@ -0,0 +1,31 @@
+"""
+scrape_poe_info - scrapes information from the PoE wiki for use by the POE-ItemInfo ahk script.
+
+Each data type has its own module with the same three steps:
+	fetch()							gets the data from the wiki
+	transform(data)					turns it into the lines of the AHK data file
+	render(lines, output_dir)		writes the data file
+
+	from scrape_poe_info import uniques
+	lines = uniques.transform(uniques.fetch(['Belts']))
+
+build(data) turns the fetched data into format independent records (see model), which
+export.export() writes as AHK, JSON and MessagePack in one pass.
+
+Submodules are only imported when they are first used, so importing the package is cheap
+and has no side effects.
+"""
+
+import importlib
+
+__all__ = ['cards', 'export', 'gems', 'history', 'maps', 'markup', 'model', 'names', 'schedule', 'serve', 'transport', 'uniques', 'wiki']
+
+
+def __getattr__(name):
+	if name in __all__:
+		return importlib.import_module('.' + name, __name__)
+	raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def __dir__():
+	return sorted(list(globals()) + __all__)
@@ -0,0 +1,23 @@
+"""
+scrape_poe_info.cli - command line handling shared by the scraper entry points.
+"""
+
+import argparse
+from scrape_poe_info import export
+
+DEFAULT_FORMATS = ['ahk', 'names']		# modules can define their own DEFAULT_FORMATS
+
+
+def build_parser(description):
+	parser = argparse.ArgumentParser(description=description)
+	parser.add_argument('-o', '--output-dir', default='.', help='directory the generated file is written to (default: current directory)')
+	parser.add_argument('-f', '--format', nargs='+', choices=export.FORMATS, default=DEFAULT_FORMATS, help='output formats, written in a single pass (default: ' + ' '.join(DEFAULT_FORMATS) + ')')
+	parser.add_argument('--history-dir', help='keep the versions of the generated files and patches between them in this directory')
+	parser.add_argument('--http2', action='store_true', help='multiplex requests over HTTP/2 (needs httpx[http2])')
+	return parser
+
+
+def parse_args(description, argv=None, parser=None):
+	if parser is None:
+		parser = build_parser(description)
+	return parser.parse_args(argv)
@@ -0,0 +1,206 @@
+"""
+scrape_poe_info.export - writes the records of a data type in several formats in a single pass.
+
+	records = uniques.build(uniques.fetch())
+	export.export(uniques, records, 'out', ['ahk', 'json', 'msgpack'])
+
+writes out/Uniques.txt (exactly what render() writes), out/Uniques.json and out/Uniques.msgpack.
+The JSON and MessagePack files hold {'type': ..., 'generated': ..., 'records': [...]}
+with one dict per record (see scrape_poe_info.model). MessagePack needs the msgpack package.
+
+The 'dict' format (uniques only) is the dictionary-compressed variant Uniques.dict.json:
+{'type': ..., 'generated': ..., 'items': [...], 'templates': [...]}, where each mod text
+is stored once in 'templates' and the items refer to it by index (see uniques.dictionary_entry()).
+
+The 'names' format is the name index <stem>.names.json for fuzzy lookups, see scrape_poe_info.names.
+"""
+
+import datetime, os
+
+FORMATS = ('ahk', 'json', 'msgpack', 'dict', 'names')
+
+
+def data_type(module):
+	return module.__name__.rsplit('.', 1)[-1]
+
+
+def output_path(module, output_dir, fmt):
+	if fmt == 'ahk':
+		return os.path.join(output_dir, module.OUTPUT_FILE)
+	if fmt in ('dict', 'names'):
+		return os.path.join(output_dir, os.path.splitext(module.OUTPUT_FILE)[0] + '.' + fmt + '.json')
+	return os.path.join(output_dir, os.path.splitext(module.OUTPUT_FILE)[0] + '.' + fmt)
+
+
+class AhkWriter(object):
+	"""
+	the AHK data file: the module's file header, its preamble (if any) and one line per record
+	"""
+
+	def __init__(self, module, records, path):
+		self.module = module
+		self.file = open(path, 'wb')
+		lines = module.define_file_header()
+		if hasattr(module, 'ahk_preamble'):
+			lines = lines + module.ahk_preamble(records)
+		for line in lines:
+			self.write_line(line)
+
+	def write_line(self, line):
+		self.file.write(line.encode('cp1252'))
+		self.file.write(b'\n')
+
+	def add(self, record):
+		self.write_line(self.module.ahk_line(record))
+
+	def close(self):
+		self.file.close()
+
+
+class JsonWriter(object):
+	"""
+	streams the records into a JSON document, one record per line
+	"""
+
+	def __init__(self, module, records, path, generated):
+		import json
+		self.json = json
+		self.file = open(path, 'w', encoding='utf-8')
+		self.file.write('{"type": ' + json.dumps(data_type(module)) + ', "generated": ' + json.dumps(generated) + ', "records": [')
+		self.first = True
+
+	def add(self, record):
+		if not self.first:
+			self.file.write(',')
+		self.first = False
+		self.file.write('\n' + self.json.dumps(record.to_dict(), ensure_ascii=False))
+
+	def close(self):
+		self.file.write('\n]}\n')
+		self.file.close()
+
+
+class MsgpackWriter(object):
+	"""
+	streams the records into a MessagePack map
+	"""
+
+	def __init__(self, module, records, path, generated):
+		import msgpack
+		self.packer = msgpack.Packer(use_bin_type=True)
+		self.file = open(path, 'wb')
+		self.file.write(self.packer.pack_map_header(3))
+		for key, value in (('type', data_type(module)), ('generated', generated)):
+			self.file.write(self.packer.pack(key))
+			self.file.write(self.packer.pack(value))
+		self.file.write(self.packer.pack('records'))
+		self.file.write(self.packer.pack_array_header(len(records)))
+
+	def add(self, record):
+		self.file.write(self.packer.pack(record.to_dict()))
+
+	def close(self):
+		self.file.close()
+
+
+class DictionaryWriter(object):
+	"""
+	streams the items of the dictionary-compressed output; the template table,
+	which is only complete after the last item, is written at the end
+	"""
+
+	def __init__(self, module, records, path, generated):
+		import json
+		from scrape_poe_info import model
+		self.json = json
+		self.module = module
+		self.templates = model.StringPool()
+		self.file = open(path, 'w', encoding='utf-8')
+		self.file.write('{"type": ' + json.dumps(data_type(module)) + ', "generated": ' + json.dumps(generated) + ', "items": [')
+		self.first = True
+
+	def add(self, record):
+		if not self.first:
+			self.file.write(',')
+		self.first = False
+		entry = self.module.dictionary_entry(record, self.templates)
+		self.file.write('\n' + self.json.dumps(entry, ensure_ascii=False, separators=(',', ':')))
+
+	def close(self):
+		self.file.write('\n], "templates": ' + self.json.dumps(self.templates.strings, ensure_ascii=False, indent=0) + '}\n')
+		self.file.close()
+
+
+class NamesWriter(object):
+	"""
+	collects the names and aliases of the records; the index is built and written at the end
+	"""
+
+	def __init__(self, module, records, path, generated):
+		self.module = module
+		self.path = path
+		self.generated = generated
+		self.records = []
+
+	def add(self, record):
+		self.records.append(record)
+
+	def close(self):
+		import json
+		from scrape_poe_info import names
+		document = {'type': data_type(self.module), 'generated': self.generated}
+		document.update(names.NameIndex.build(names.name_entries(self.module, self.records)).to_dict())
+		with open(self.path, 'w', encoding='utf-8') as f:
+			json.dump(document, f, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+
+def check_formats(module, formats):
+	"""
+	Raises ValueError if module cannot be exported in one of formats,
+	or ImportError if a format needs a package that is not installed.
+	"""
+	for fmt in formats:
+		if fmt not in FORMATS:
+			raise ValueError('unknown output format: ' + fmt)
+	if 'dict' in formats and not hasattr(module, 'dictionary_entry'):
+		raise ValueError('the dict format is only available for unique items')
+	if 'msgpack' in formats:
+		try:
+			import msgpack
+		except ImportError:
+			raise ImportError('the msgpack output needs the msgpack package (pip install msgpack)')
+
+
+def export(module, records, output_dir='.', formats=('ahk',)):
+	"""
+	Writes records (a list, as returned by module.build()) in all given formats,
+	going over the records only once. Returns {format: path of the written file}.
+	"""
+	check_formats(module, formats)
+
+	generated = datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+	paths = {}
+	writers = []
+	try:
+		for fmt in formats:
+			path = output_path(module, output_dir, fmt)
+			if fmt == 'ahk':
+				writers.append(AhkWriter(module, records, path))
+			elif fmt == 'json':
+				writers.append(JsonWriter(module, records, path, generated))
+			elif fmt == 'dict':
+				writers.append(DictionaryWriter(module, records, path, generated))
+			elif fmt == 'names':
+				writers.append(NamesWriter(module, records, path, generated))
+			else:
+				writers.append(MsgpackWriter(module, records, path, generated))
+			paths[fmt] = path
+
+		for record in records:
+			for writer in writers:
+				writer.add(record)
+	finally:
+		for writer in writers:
+			writer.close()
+
+	return paths
@@ -0,0 +1,441 @@
+"""
+scrape_poe_info.gems - scrapes poe gems from the wiki using the API.
+
+fetch() gets the gems from the wiki, transform() turns them into lines for GemQualityList.txt
+and render() writes that file.
+
+With --levels the per-level progression of every gem (the cargo skill_levels table, tens of thousands
+of rows) is streamed page by page into a LevelTable, which GemQualityList.txt and GemLevelList.txt
+are then both rendered from.
+"""
+
+import re, datetime, math, os, sys
+from array import array
+from scrape_poe_info import cli, export, history, model, names, transport, wiki
+
+OUTPUT_FILE = 'GemQualityList.txt'
+LEVEL_OUTPUT_FILE = 'GemLevelList.txt'
+
+LEVEL_COLUMNS = [
+	('level requirement', 'i'),
+	('experience', 'q'),
+	('mana cost', 'i'),
+	('critical strike chance', 'f'),
+	('damage effectiveness', 'f'),
+]
+"""
+the columns of the skill_levels table kept per level, with their array type code.
+Missing integers are stored as -1, missing decimals as NaN.
+"""
+
+# Regex magic! I recommend using https://regex101.com to make it more readable.
+
+regex_single_value = re.compile(r'\+?([\d\.]+)(%?)')
+"""
+matches the number before the % value such as:
+	0.5%
+	1%
+	+0.5%
+"""
+
+def clean_up_api_results(api_results):
+	"""
+	Takes the API result and turns it into a list of json objects.
+	At this stage the mods are still in the original wiki format.
+	Multilines are separated by '<br>'.	
+	A gem repeated by overlapping pages of the query (see wiki.cargo_query()) is kept once.
+	"""
+	
+	#gem_names = list(api_results.keys())
+	#gem_names.sort()
+	partial_gem_list = []
+	seen = set()
+	for result in api_results:
+		itemdata = result['title']
+		if itemdata['name'] in seen:
+			continue
+		seen.add(itemdata['name'])
+		obj = {}
+		obj['name'] = itemdata['name']
+		obj['qtext'] = itemdata['quality stat text']
+		partial_gem_list.append(obj)
+	
+	return partial_gem_list
+	
+	
+def get_api_results():
+	"""
+	This function gets the wiki data for given unique item categories.
+	It uses the wiki's API and requests json format, 500 gems per request (see wiki.cargo_query()).
+	See this HTML version to get a better idea how the API response is structured:
+	https://pathofexile.gamepedia.com/api.php?action=cargoquery&format=json&limit=500&tables=skill&fields=_pageName=name%2Cquality_stat_text&where=_pageName%20NOT%20LIKE%20%27Skill:%%27&formatversion=1
+	"""
+	
+	print('Getting data for gems')
+	api_results = wiki.cargo_query('skill', '_pageName=name,quality_stat_text', "_pageName NOT LIKE 'Skill:%'", order_by='_pageName')
+	
+	return clean_up_api_results(api_results)
+
+
+def get_wiki_data():
+	gem_list = []
+	#for category in gem_categories:
+	#	gem_list.extend(get_api_results(category))
+	
+	gem_list.extend(get_api_results())
+	
+	print('')
+	return gem_list
+
+
+def	separate_num(text_line):
+	"""
+	Takes a quality text line and modifies it to match the desired format for 
+	the PoE ItemInfo Script's "GemQualityList.txt" file.
+	"""
+	
+	return format_quality(*parse_quality_text(text_line))
+
+
+def parse_quality_text(text_line):
+	"""
+	Splits a quality text line into the stats at 20% quality, the distinct values per 1% quality
+	and their unit ('%' or ''). The stats are empty if the last line has no number.
+	"""
+	
+	text_parts = []
+	num_parts = []
+	perc = ''
+	
+	mod_list = text_line.split('&lt;br&gt;')
+	for mod in mod_list:
+		num_match = regex_single_value.search(mod)
+		if num_match is not None:
+			num_part = num_match.group(1)
+			if num_match.group(2) is not None:
+				perc = num_match.group(2)
+			else:
+				perc = ''
+			
+			text_part = mod.replace(num_part, str(int(20*float(num_part))))
+			text_part = re.sub(r'^Supported Skills (have|deal) | from Supported Skills$', '', text_part)
+			
+			if not num_parts:
+				num_parts.append(num_part)
+			elif num_parts[0] != num_part:
+				num_parts.append(num_part)
+			
+			text_parts.append(text_part)
+			parsed = True
+		
+		else:
+			parsed = False
+	
+	if not parsed:
+		return [], [], ''
+	return text_parts, num_parts, perc
+
+
+def format_quality(text_parts, num_parts, perc):
+	if not text_parts:
+		return ''
+	return '`n '.join(text_parts) + '`n ' + '(' + (perc + ' / ').join(num_parts) + perc + ' per 1% Q)'
+
+
+def build_gems(gem_list):
+	"""
+	Takes a list of json objects, holding the item informations, and turns them into Gems.
+	"""
+	
+	gems = []
+	for item in gem_list:
+		stats, per_quality, unit = parse_quality_text(item['qtext'])
+		name = names.split_title(item['name'])[0]
+		gems.append(model.Gem(name, stats, per_quality, unit, item['name']))
+		if not stats:
+			print("Parsing error for: " + item['name'])
+	
+	return gems
+
+
+def ahk_line(gem):
+	"""
+	The GemQualityList.txt line of a Gem.
+	"""
+	return 'gemQualityList["' + gem.name + '"] := " ' + format_quality(gem.quality_stats, gem.per_quality, gem.unit) + '"'
+
+
+def name_aliases(gem):
+	"""
+	The names a Gem can also be looked up by in the name index: its disambiguated wiki page title.
+	"""
+	if gem.page is None or gem.page == gem.name:
+		return []
+	return [gem.page]
+
+
+class LevelTable(object):
+	"""
+	The level progression of all gems in columnar form: one array per column of the skill_levels table,
+	with one entry per (gem, level) row, instead of a dict per row. The rows of a gem are contiguous
+	and ordered by level; runs[gem index] is their (start, stop). The gem names, their wiki page titles
+	and their quality texts are per gem, in the order of model.StringPool pages.
+	"""
+	
+	def __init__(self, columns=LEVEL_COLUMNS):
+		self.pages = model.StringPool()
+		self.quality_texts = []
+		self.levels = array('B')
+		self.columns = [(field, array(type_code)) for field, type_code in columns]
+		self.runs = {}
+	
+	def gem_index(self, page):
+		position = self.pages.index(page)
+		if position == len(self.quality_texts):
+			self.quality_texts.append(None)
+		return position
+	
+	def add_gem(self, page, quality_text):
+		self.quality_texts[self.gem_index(page)] = quality_text
+	
+	def add_level(self, page, level, values):
+		"""
+		appends the row of page at level; values are the raw texts of the wiki by field name.
+		The rows have to come ordered by page and level. A row that was already added, e.g. repeated by
+		overlapping pages, is skipped; so is a row that comes out of order because the table changed during
+		the scrape (it is reported, the next scrape gets it).
+		"""
+		gem = self.gem_index(page)
+		row = len(self.levels)
+		run = self.runs.get(gem)
+		if run is not None:
+			if level in self.levels[run[0]:run[1]]:
+				return
+			if run[1] != row or self.levels[row - 1] > level:
+				print('Skipping level {} of {}, it came out of order (the table changed during the scrape?)'.format(level, page))
+				return
+			self.runs[gem] = (run[0], row + 1)
+		else:
+			self.runs[gem] = (row, row + 1)
+		
+		self.levels.append(level)
+		for field, column in self.columns:
+			column.append(parse_level_value(values.get(field), column.typecode))
+	
+	def __len__(self):
+		return len(self.levels)
+	
+	def rows(self, page):
+		"""
+		the rows of the gem with the wiki page title page, as range of row indexes
+		"""
+		position = self.pages.indexes.get(page)
+		if position is None or position not in self.runs:
+			return range(0)
+		return range(*self.runs[position])
+	
+	def row(self, page, level):
+		for row in self.rows(page):
+			if self.levels[row] == level:
+				return {field: column[row] for field, column in self.columns}
+		return None
+	
+	def memory_size(self):
+		"""
+		the bytes held by the level columns
+		"""
+		return sum(column.itemsize * len(column) for column in [self.levels] + [column for _, column in self.columns])
+
+
+def parse_level_value(text, type_code):
+	"""
+	a number of the skill_levels table, or -1 / NaN if it is missing
+	"""
+	if type_code in 'fd':
+		try:
+			return float(text)
+		except (TypeError, ValueError):
+			return math.nan
+	try:
+		return int(float(text))
+	except (TypeError, ValueError):
+		return -1
+
+
+def ingest_levels(table, results):
+	"""
+	Adds the cargo results of the skill_levels table (an iterable, e.g. the stream of wiki.cargo_query()) to table.
+	"""
+	for result in results:
+		fields = result['title']
+		level = parse_level_value(fields.get('level'), 'i')
+		if 0 < level < 256:
+			table.add_level(fields['name'], level, fields)
+	return table
+
+
+def get_level_data(table=None):
+	"""
+	Streams the gems with their quality texts and then their levels from the wiki into a LevelTable.
+	"""
+	if table is None:
+		table = LevelTable()
+	for gem in get_api_results():
+		table.add_gem(gem['name'], gem['qtext'])
+	
+	print('Getting level progression for gems')
+	fields = ','.join(['_pageName=name', 'level'] + [field.replace(' ', '_') for field, _ in table.columns])
+	results = wiki.cargo_query('skill_levels', fields, "_pageName NOT LIKE 'Skill:%'", order_by='_pageName,level')
+	ingest_levels(table, results)
+	print('{} levels of {} gems ({} KiB)'.format(len(table), len(table.runs), table.memory_size() // 1024))
+	return table
+
+
+def gem_list_from_table(table):
+	"""
+	the gems of table as returned by get_wiki_data(), to build the quality list from
+	"""
+	return [{'name': page, 'qtext': text} for page, text in zip(table.pages.strings, table.quality_texts) if text is not None]
+
+
+def format_level_value(value):
+	if isinstance(value, float):
+		if math.isnan(value):
+			return ''
+		return ('%g' % value)
+	if value < 0:
+		return ''
+	return str(value)
+
+
+def level_ahk_line(table, page):
+	"""
+	The GemLevelList.txt line of a gem: its levels separated by '|', each as
+	level:level requirement:experience:mana cost:critical strike chance:damage effectiveness
+	"""
+	levels = []
+	for row in table.rows(page):
+		levels.append(':'.join([str(table.levels[row])] + [format_level_value(column[row]) for _, column in table.columns]))
+	return 'gemLevelList["' + names.split_title(page)[0] + '"] := "' + '|'.join(levels) + '"'
+
+
+def convert_levels_to_AHK_script_format(table):
+	"""
+	the lines of GemLevelList.txt, one per gem with levels, in the order the gems were fetched
+	"""
+	return [level_ahk_line(table, page) for position, page in enumerate(table.pages.strings) if position in table.runs]
+
+
+def define_level_file_header():
+	data = []
+	d = datetime.datetime.now()
+	now_time = d.strftime('%Y-%m-%d at %H:%M:%S')
+	data.append('; Data from https://pathofexile.gamepedia.com/Path_of_Exile_Wiki using the API.')
+	data.append('; Each gem lists its levels separated by "|", as')
+	data.append(';	level:' + ':'.join(field for field, _ in LEVEL_COLUMNS))
+	data.append('; Empty values are missing on the wiki.')
+	data.append(';')
+	data.append('; This file was auto-generated by scrape_poe_gems.py --levels on {}'.format(now_time) + '\n')
+	data.append('gemLevelList := Object()\n')
+
+	return data
+
+
+def render_levels(table, output_dir='.'):
+	"""
+	Writes GemLevelList.txt from table into output_dir and returns its path.
+	"""
+	path = os.path.join(output_dir, LEVEL_OUTPUT_FILE)
+	open(path, 'w').close()
+	write_list_to_lines(define_level_file_header(), path)
+	write_list_to_lines(convert_levels_to_AHK_script_format(table), path)
+	return path
+
+
+def	convert_to_AHK_script_format(gem_list):
+	"""
+	Takes a list of json objects, holding the item informations.
+	Parses items one by one and creates a list with text lines in the format
+	for the PoE ItemInfo Script's "GemQualityList.txt" file.
+	"""
+	
+	return [ahk_line(gem) for gem in build_gems(gem_list)]
+
+
+def define_file_header():
+	"""
+	info header for GemQualityList.txt
+
+	:return: list
+	"""
+	data = []
+	d = datetime.datetime.now()
+	now_time = d.strftime('%Y-%m-%d at %H:%M:%S')
+	data.append('; Data from https://pathofexile.gamepedia.com/Path_of_Exile_Wiki using the API.')
+	data.append('; Comments can be made with ";", blank lines will be ignored.')
+	data.append(';')
+	data.append('; This file was auto-generated by scrape_poe_gems.py on {}'.format(now_time) + '\n')
+	data.append('gemQualityList := Object()')
+	data.append('gemQualityList["Unknown Gem"] := "No gem quality data found. Please report it."\n')
+
+	return data
+
+
+def write_list_to_lines(new_data, path):
+	file = open(path, 'a+b')  # opens file for writing
+	for row in new_data:
+		file.write(row.encode('cp1252'))
+		file.write(b'\n')
+	file.close()
+
+
+def fetch():
+	"""
+	Gets the gems and their quality stats from the wiki.
+	"""
+	return get_wiki_data()
+
+
+def build(gem_list):
+	"""
+	Turns the fetched gems into Gems (see scrape_poe_info.model), for export().
+	"""
+	return build_gems(gem_list)
+
+
+def transform(gem_list):
+	"""
+	Turns the fetched gems into the lines of GemQualityList.txt, without the file header.
+	"""
+	return convert_to_AHK_script_format(gem_list)
+
+
+def render(new_data, output_dir='.'):
+	"""
+	Writes GemQualityList.txt (header and the transformed lines) into output_dir and returns its path.
+	"""
+	path = os.path.join(output_dir, OUTPUT_FILE)
+	open(path, 'w').close()  # create file (or overwrite it if it exists)
+	write_list_to_lines(define_file_header(), path)
+	write_list_to_lines(new_data, path)
+	return path
+
+
+def main(argv=None):
+	# gem_categories = ['Support Skill Gems','Active Skill Gems']
+	parser = cli.build_parser('Scrapes gem quality stats from the PoE wiki into ' + OUTPUT_FILE + '.')
+	parser.add_argument('--levels', action='store_true', help='also stream the level progression of every gem into ' + LEVEL_OUTPUT_FILE)
+	args = cli.parse_args(None, argv, parser)
+	transport.configure(http2=args.http2)
+	startTime = datetime.datetime.now()
+	if args.levels:
+		table = get_level_data()
+		paths = export.export(sys.modules[__name__], build(gem_list_from_table(table)), args.output_dir, args.format)
+		paths['levels'] = render_levels(table, args.output_dir)
+	else:
+		paths = export.export(sys.modules[__name__], build(fetch()), args.output_dir, args.format)
+	if args.history_dir:
+		for path in paths.values():
+			history.record(path, args.history_dir)
+	print('\n' + transport.shared().report())
+	print('Program execution time: ',(datetime.datetime.now() - startTime))
@@ -0,0 +1,237 @@
+"""
+scrape_poe_info.history - keeps the versions of the generated files and line-level patches between them.
+
+record() stores a generated file as a new version (if its content changed) in
+<history dir>/<file name>/, together with a patch from the previous version:
+
+	manifest.json						the versions in order, with their sha256, content_sha256 and the patch leading to them
+	versions/<sha256>.gz				the full content of each version
+	patches/<from>-<to>.patch.gz		gzipped JSON patch between two consecutive versions
+
+Clients that have any recorded version can then download the (small) patches instead of the
+whole file, and apply them with apply_patch() or `scrape-poe-patch update FILE HISTORY_DIR`.
+A patch holds the sha256 of the content it applies to and of the result; both are checked.
+
+Patches are computed on the raw bytes split into lines, so any encoding is reproduced exactly:
+	{"from": sha256, "to": sha256, "ops": [["=", line count], ["-", line count], ["+", [lines]], ...]}
+The added lines are stored as latin-1 decoded text, which maps every byte to one character.
+
+Every export is stamped with the time it was generated (the AHK file header, the 'generated' field),
+so two scrapes of the same data never have the same bytes. Whether the content changed is decided by
+content_sha256, the hash with these timestamps blanked out (see VOLATILE). If only the timestamps
+changed, no version is added and the file is reset to the recorded version, so that it keeps matching it.
+"""
+
+import datetime, gzip, hashlib, json, os, re
+
+MANIFEST = 'manifest.json'
+
+VOLATILE = [
+	re.compile(rb'(auto-generated by [^\r\n]*? on )[^\r\n]*'),		# AHK file headers
+	re.compile(rb'("generated": ?)"[^"]*"'),						# JSON exports
+	re.compile(rb'(\xa9generated)\xb3[-0-9T:]{19}'),				# MessagePack exports
+]
+"""
+the parts of the generated files that change on every run; the first capture group is kept
+"""
+
+
+class PatchError(Exception):
+	pass
+
+
+def sha256(data):
+	return hashlib.sha256(data).hexdigest()
+
+
+def content_sha256(data):
+	"""
+	the sha256 of data with the timestamps of the exports (VOLATILE) blanked out
+	"""
+	for pattern in VOLATILE:
+		data = pattern.sub(rb'\1', data)
+	return sha256(data)
+
+
+def version_content_sha256(directory, version):
+	"""
+	the content_sha256 of a manifest entry; computed from the stored version for entries recorded without it
+	"""
+	if version.get('content_sha256') is None:
+		with gzip.open(os.path.join(directory, 'versions', version['sha256'] + '.gz'), 'rb') as f:
+			version['content_sha256'] = content_sha256(f.read())
+	return version['content_sha256']
+
+
+def make_patch(old, new):
+	"""
+	the patch turning the bytes old into the bytes new
+	"""
+	import difflib
+
+	old_lines = old.splitlines(True)
+	new_lines = new.splitlines(True)
+	ops = []
+	matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+	for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+		if tag == 'equal':
+			ops.append(['=', old_end - old_start])
+			continue
+		if old_end > old_start:
+			ops.append(['-', old_end - old_start])
+		if new_end > new_start:
+			ops.append(['+', [line.decode('latin-1') for line in new_lines[new_start:new_end]]])
+	return {'from': sha256(old), 'to': sha256(new), 'ops': ops}
+
+
+def apply_patch(old, patch):
+	"""
+	applies patch to the bytes old and returns the new bytes. Raises PatchError if old is not
+	the content the patch was made for, or if the result does not have the expected hash.
+	"""
+	if sha256(old) != patch['from']:
+		raise PatchError('the patch does not apply to this content (sha256 {} expected)'.format(patch['from']))
+
+	old_lines = old.splitlines(True)
+	position = 0
+	new = []
+	for op, argument in patch['ops']:
+		if op == '=':
+			new.extend(old_lines[position:position + argument])
+			position += argument
+		elif op == '-':
+			position += argument
+		elif op == '+':
+			new.extend(line.encode('latin-1') for line in argument)
+		else:
+			raise PatchError('unknown patch operation: ' + repr(op))
+	if position != len(old_lines):
+		raise PatchError('the patch does not cover the whole content')
+
+	result = b''.join(new)
+	if sha256(result) != patch['to']:
+		raise PatchError('the patched content does not have the expected sha256 ' + patch['to'])
+	return result
+
+
+def read_patch(path):
+	with gzip.open(path, 'rt', encoding='utf-8') as f:
+		return json.load(f)
+
+
+def load_manifest(directory, file_name=None):
+	path = os.path.join(directory, MANIFEST)
+	if not os.path.exists(path):
+		return {'file': file_name, 'versions': []}
+	with open(path, 'r', encoding='utf-8') as f:
+		return json.load(f)
+
+
+def record(path, history_dir):
+	"""
+	Adds the current content of the generated file at path to its history in history_dir.
+	Returns the new manifest entry, or None if the content did not change; then the file
+	is overwritten with the latest recorded version, which only differs in its timestamps.
+	"""
+	file_name = os.path.basename(path)
+	directory = os.path.join(history_dir, file_name)
+	os.makedirs(os.path.join(directory, 'versions'), exist_ok=True)
+	os.makedirs(os.path.join(directory, 'patches'), exist_ok=True)
+
+	with open(path, 'rb') as f:
+		content = f.read()
+	digest = sha256(content)
+	content_digest = content_sha256(content)
+
+	manifest = load_manifest(directory, file_name)
+	versions = manifest['versions']
+	if versions and version_content_sha256(directory, versions[-1]) == content_digest:
+		if versions[-1]['sha256'] != digest:
+			with gzip.open(os.path.join(directory, 'versions', versions[-1]['sha256'] + '.gz'), 'rb') as f:
+				content = f.read()
+			with open(path, 'wb') as f:
+				f.write(content)
+		return None
+
+	with gzip.open(os.path.join(directory, 'versions', digest + '.gz'), 'wb') as f:
+		f.write(content)
+
+	entry = {
+		'version': versions[-1]['version'] + 1 if versions else 1,
+		'sha256': digest,
+		'content_sha256': content_digest,
+		'size': len(content),
+		'created': datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+		'patch': None,
+		'patch_size': None,
+	}
+	if versions:
+		previous = versions[-1]['sha256']
+		with gzip.open(os.path.join(directory, 'versions', previous + '.gz'), 'rb') as f:
+			old = f.read()
+		patch_name = 'patches/{}-{}.patch.gz'.format(previous[:16], digest[:16])
+		with gzip.open(os.path.join(directory, patch_name), 'wt', encoding='utf-8') as f:
+			json.dump(make_patch(old, content), f, ensure_ascii=False, separators=(',', ':'))
+		entry['patch'] = patch_name
+		entry['patch_size'] = os.path.getsize(os.path.join(directory, patch_name))
+
+	versions.append(entry)
+	with open(os.path.join(directory, MANIFEST), 'w', encoding='utf-8') as f:
+		json.dump(manifest, f, indent='\t')
+	return entry
+
+
+def update(path, directory):
+	"""
+	Brings the file at path up to the latest version in directory (the history of that file)
+	by applying the patches after its current version. Returns the number of patches applied.
+	"""
+	with open(path, 'rb') as f:
+		content = f.read()
+	versions = load_manifest(directory)['versions']
+	digests = [version['sha256'] for version in versions]
+	current = sha256(content)
+	if current not in digests:
+		raise PatchError(path + ' is not a recorded version, download the full file instead')
+
+	applied = 0
+	for version in versions[digests.index(current) + 1:]:
+		content = apply_patch(content, read_patch(os.path.join(directory, version['patch'])))
+		applied += 1
+
+	if applied:
+		with open(path, 'wb') as f:
+			f.write(content)
+	return applied
+
+
+def main(argv=None):
+	import argparse, sys
+
+	parser = argparse.ArgumentParser(description='Applies the patches recorded by the scrapers (--history-dir) to a data file.')
+	commands = parser.add_subparsers(dest='command')
+	command = commands.add_parser('update', help='bring FILE up to the latest version recorded in HISTORY_DIR')
+	command.add_argument('file')
+	command.add_argument('history_dir', help='the history of this file, e.g. history/Uniques.txt')
+	command = commands.add_parser('apply', help='apply a single patch to FILE')
+	command.add_argument('file')
+	command.add_argument('patch', help='a .patch.gz file')
+	command.add_argument('-o', '--output', help='write the result here instead of overwriting FILE')
+	args = parser.parse_args(argv)
+
+	try:
+		if args.command == 'update':
+			applied = update(args.file, args.history_dir)
+			print('{}: applied {} patch(es)'.format(args.file, applied))
+		elif args.command == 'apply':
+			with open(args.file, 'rb') as f:
+				content = apply_patch(f.read(), read_patch(args.patch))
+			with open(args.output or args.file, 'wb') as f:
+				f.write(content)
+		else:
+			parser.print_help()
+			return 2
+	except PatchError as e:
+		print('error: ' + str(e), file=sys.stderr)
+		return 1
+	return 0
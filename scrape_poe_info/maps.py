@@ -0,0 +1,344 @@
+"""
+scrape_poe_info.maps - scrapes poe maps from http://pathofexile.gamepedia.com/Map
+(modified from scrape_poe_info.uniques)
+
+fetch() gets the map list and the individual map pages from the wiki, transform() turns them
+into lines for MapList.txt and render() writes that file.
+"""
+
+import re, datetime, os, sys
+from scrape_poe_info import cli, export, history, model, transport, wiki
+
+DATADIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+OUTPUT_FILE = 'MapList.txt'
+THREADS = 4
+
+main_path = '/User:ARTyficial/MapData'
+
+rx_search = re.compile(r'\+*\(([\d\.]+)\s[a-z]+\s([\d\.]+)[)]|(\+*[\d\.]+\%)|([\d\.]+-[\d\.]+)|(\([\d\.]+-[\d\.]+)\s\w+\s([\d\.]+-[\d\.]+\))|(-?\+?[\d\.]+)')
+vendor_regex = re.compile('yields? one|produces? one', re.IGNORECASE)
+maptype_regex = re.compile('Map type', re.IGNORECASE)
+
+
+def define_file_header():
+	"""
+	info headers for MapList.txt
+
+	:return: list
+	"""
+	data = []
+	d = datetime.datetime.now()
+	now_time = d.strftime('%Y-%m-%d at %H:%M:%S')
+	data.append('; Data from https://pathofexile.gamepedia.com' + main_path)
+	data.append('; Comments can be made with ";", blank lines will be ignored.')
+	data.append(';')
+	data.append('; This file was auto-generated by scrape_poe_maps.py on {}'.format(now_time) + '\n')
+	data.append('mapList := Object()')
+	data.append('mapList["Unknown Map"] := "Map not recognised or not supported"\n')
+	data.append('uniqueMapList := Object()')
+	data.append('uniqueMapList["Unknown Map"] := "Map not recognised or not supported"\n')
+
+	return data
+
+
+def get_main_page(path):
+	"""
+	Gets the main wiki page for Maps and parses out the links for each map
+	and returns a list of the urls
+	:param path: main page path on the wiki
+	:return: list, containing basic map data and list of urls
+	"""
+	print('Getting User:ARTyficial/MapData ...')
+	page = wiki.get(path)
+	return parse_main_page(page.text)
+
+
+def parse_main_page(html):
+	"""
+	parses the map tables of the main page
+	:param html: text of the main page
+	:return: list, containing basic map data and list of urls
+	"""
+	import bs4
+	
+	map_list = []
+	soup = bs4.BeautifulSoup(html, 'html.parser')
+	map_table = soup.find_all('table', class_='wikitable sortable')
+	mapcount = 1
+	for row in map_table[0].find_all('tr'):
+		tds = row.find_all('td')
+		if len(tds) == 0:	# exclude header row
+			continue
+		map_info = {}
+		map_info['count'] = mapcount
+		mapcount += 1
+		map_info['tier'] = tds[0].text.strip()
+		map_info['level'] = tds[1].text.strip()
+		map_info['name'] = tds[2].text.strip()
+		map_info['url'] = '/' + map_info['name'].replace(' ', '_') + '_Map_(War_for_the_Atlas)'
+		map_info['producedby'] = tds[3].text.strip().replace(';', ', ')
+		map_info['upgradesto'] = tds[4].text.strip()
+		map_info['tileset'] = tds[5].text.strip()
+		map_info['unique'] = False
+		
+		map_list.append(map_info)
+	
+	for row in map_table[1].find_all('tr'):
+		tds = row.find_all('td')
+		if len(tds) == 0:	# exclude header row
+			continue
+		map_info = {}
+		map_info['count'] = mapcount
+		mapcount += 1
+		map_info['tier'] = tds[0].text.strip()
+		map_info['level'] = tds[1].text.strip()
+		map_info['name'] = tds[2].text.strip()
+		map_info['url'] = '/' + map_info['name'].replace(' ', '_') + '_(War_for_the_Atlas)'
+		#map_info['base'] = tds[3].text.strip()
+		map_info['tileset'] = tds[4].text.strip()
+		map_info['unique'] = True
+		
+		map_list.append(map_info)
+
+	return map_list
+
+
+def parse_map_data(map_info):
+	"""
+	fetches the page for a map
+	:param links:
+	:return:
+	"""
+	import bs4
+	
+	page = wiki.get(map_info['url'])
+	soup = bs4.BeautifulSoup(page.text, 'html.parser')
+	return build_data(soup, map_info)
+
+"""
+def find_divcards(div):
+	for h2 in div.find_all('h2'):
+		if h2.find('span', id='Divination_cards'):
+			return h2
+	return None
+	
+def find_vendor_recipe(div):
+	try:
+		for yields in div.find_all(text=vendor_regex):
+			return yields.next_sibling.findNext('a').findNext('a').text
+	except:
+		return None
+	return None
+	
+
+def find_setting(div):
+	try:
+		for maptype in div.find_all(text=maptype_regex):
+			return maptype.parent.next_sibling.replace(':', '').strip()
+	except:
+		return None
+	return None
+"""
+
+
+def build_data(data, mapinfo):
+	"""
+	parse map data from the page
+	:param data: BS4 ResultSet
+	:return: list
+	"""
+	map_data = dict(mapinfo)
+	print('Getting data for {}'.format(map_data['name']))
+	
+	map_data['divcards'] = []
+	
+	items_heading = data.find(id='Items_found_in_this_area')
+	if items_heading is not None:
+		items_table = items_heading.find_next('table')
+		
+		divcards = items_table.find_all('span', class_='divicard-header')
+		for divcard in divcards:
+			map_data['divcards'].append(divcard.text)
+		
+	# find the map setting (indoors/outdoors)
+	#map_data['setting'] = find_setting(div)
+	
+	return map_data
+
+
+def load_map_descriptions():
+	"""
+	the prewritten text descriptions for maps, as {'maps': {name: text}, 'uniqueMaps': {name: text}}
+	"""
+	import json
+	
+	with open(os.path.join(DATADIR, 'MapDescriptions.json'), 'r', encoding='cp1252') as f:
+		return json.load(f)
+
+
+def build_maps(all_data, map_descriptions=None):
+	"""
+	Turns the parsed map pages into Maps, adding the prewritten descriptions for the maps that have them.
+	"""
+	if map_descriptions is None:
+		map_descriptions = load_map_descriptions()
+	
+	maps = []
+	for mymap in all_data:
+		if mymap['unique']:
+			description = map_descriptions['uniqueMaps'].get(mymap['name'])
+		else:
+			description = map_descriptions['maps'].get(mymap['name'])
+		if description is not None:
+			description = description.replace('`n', '\n')
+		
+		maps.append(model.Map(
+			mymap['name'], mymap['unique'], mymap['tier'], mymap['level'], mymap['tileset'],
+			mymap.get('producedby'), mymap.get('upgradesto'), list(mymap['divcards']), description))
+	
+	return maps
+
+
+def ahk_preamble(maps):
+	"""
+	The lines of MapList.txt before the map entries: the list of map names to match
+	and the unique map names by base (from MapNameFromBase.txt).
+	"""
+	with open(os.path.join(DATADIR, 'MapNameFromBase.txt'), 'r', encoding='cp1252') as f:
+		uniqueMapNameFromBase = f.read()
+	
+	new_data = []
+	matchList = []
+	for mymap in maps:
+		if mymap.unique is False:
+			matchList.append(mymap.name + ' Map')
+
+	# lists sorted by descending name length to avoid mismatching ("Spider Lair Map" before "Lair Map" etc.)
+	matchList.sort(key=len, reverse=True)
+	
+	new_data.append('mapMatchList := ["' + '","'.join(matchList) + '"]\n')
+	
+	new_data.append('\n' + uniqueMapNameFromBase + '\n')
+	
+	return new_data
+
+
+def name_aliases(mymap):
+	"""
+	The names a Map can also be looked up by in the name index: the item name of regular maps, like "Spider Lair Map".
+	"""
+	if mymap.unique:
+		return []
+	return [mymap.name + ' Map']
+
+
+def ahk_line(mymap):
+	"""
+	The MapList.txt entry of a Map.
+	"""
+	line = ''
+	#line = 'Tier: ' + mymap.tier + ', Level: ' + mymap.level
+	#line += '`nTileset: ' + mymap.tileset
+
+	# Add on vendor recipes and connected maps
+	if mymap.unique is False:
+		vendor_lines = '3 to 1 vendor recipe:'
+		if mymap.produced_by:
+			vendor_lines += '`n Produced by: ' + mymap.produced_by
+		else:
+			vendor_lines += '`n Produced by: none'
+		if mymap.upgrades_to:
+			vendor_lines += '`n Upgrades to: ' + mymap.upgrades_to
+		elif mymap.tier == '16':
+			vendor_lines += '`n Upgrades to: none'
+		else:
+			vendor_lines += '`n Upgrades to: ?'
+		
+		line += vendor_lines
+
+	# Add on divination cards
+	if len(mymap.divination_cards) > 0:
+		line += '`n`nDivination cards:'
+		for divcard in mymap.divination_cards:
+			line += '`n ' + divcard
+			
+	# Here we insert the prewritten text descriptions for the maps that have them
+	if mymap.description is not None:
+		line += '`n`n' + mymap.description.replace('\n', '`n')
+
+	line = line.lstrip('`n')
+	
+	if mymap.unique:
+		return 'uniqueMapList["' + mymap.name + '"] := "' + line + '"\n'
+	return 'mapList["' + mymap.name + ' Map"] := "' + line + '"\n'
+
+
+def convert_data_to_AHK_readable_format(all_data):
+	"""
+	This function takes the raw web page data, and converts it into lines that are readable by the
+	Poe_item_info AHK script.
+	:return:
+	"""
+	
+	maps = build_maps(all_data)
+	return ahk_preamble(maps) + [ahk_line(mymap) for mymap in maps]
+
+
+def write(new_data, path):
+	file = open(path, 'a+b')  # opens file for writing
+	for row in new_data:
+		file.write(row.encode('cp1252'))
+		file.write(b'\n')
+	file.close()
+
+
+def fetch(threads=THREADS):
+	"""
+	Gets the map list and then every map page (in parallel) from the wiki.
+	"""
+	from multiprocessing.dummy import Pool as ThreadPool
+	
+	map_list = get_main_page(main_path)
+	pool = ThreadPool(threads)
+	data = pool.map(parse_map_data, map_list)
+	pool.close()
+	pool.join()
+	data.sort(key=lambda m: m['count'])
+	return data
+
+
+def build(data):
+	"""
+	Turns the fetched maps into Maps (see scrape_poe_info.model), for export().
+	"""
+	return build_maps(data)
+
+
+def transform(data):
+	"""
+	Turns the fetched maps into the lines of MapList.txt, without the file header.
+	"""
+	return convert_data_to_AHK_readable_format(data)
+
+
+def render(new_data, output_dir='.'):
+	"""
+	Writes MapList.txt (header and the transformed lines) into output_dir and returns its path.
+	"""
+	path = os.path.join(output_dir, OUTPUT_FILE)
+	open(path, 'w').close()  # create file (or overwrite it if it exists)
+	write(define_file_header(), path)
+	write(new_data, path)
+	return path
+
+
+def main(argv=None):
+	args = cli.parse_args('Scrapes maps from the PoE wiki into ' + OUTPUT_FILE + '.', argv)
+	transport.configure(pool_size=THREADS, http2=args.http2)
+	startTime = datetime.datetime.now()
+	paths = export.export(sys.modules[__name__], build(fetch()), args.output_dir, args.format)
+	if args.history_dir:
+		for path in paths.values():
+			history.record(path, args.history_dir)
+	print(transport.shared().report())
+	print('Program execution time: ',(datetime.datetime.now() - startTime))
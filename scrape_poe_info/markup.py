@@ -0,0 +1,93 @@
+"""
+scrape_poe_info.markup - removes the wiki's markup from API texts in a single scan.
+
+A Normalizer is built from a replacement table and compiled into one regular expression
+that matches wiki links and every key of the table. Each text is scanned once, left to right,
+and the result is built as one new string instead of one copy per replaced token.
+Longer keys are tried first, so '&lt;em ...&gt;Corrupted&lt;/em&gt;' wins over '&lt;'.
+"""
+
+import re
+
+WIKILINK = r'\[\[([^\]\|]*)\]\]|\[\[[^\]\|]*\|([^\]\|]*)\]\]'
+"""
+matches formats "[[text]]" or "[[wikipage|text]] and stores "text" as capture group 1 or 2, respectively.
+"""
+
+ENTITIES = {
+	'&amp;#60;': '<',
+	'&amp;#62;': '>',
+	'&lt;': '<',
+	'&gt;': '>',
+}
+"""
+the escaped angle brackets of the API texts. Other entities (like &quot;) are kept,
+since a plain '"' would end the string in the AHK data files.
+"""
+
+CORRUPTED = {
+	'&lt;em class=&quot;tc -corrupted&quot;&gt;Corrupted&lt;/em&gt;': 'Corrupted',
+}
+
+DASHES = {
+	'\u2212': '-',		# minus sign, which cp1252 cannot encode
+	'\u2013': '-',		# en dash
+}
+
+
+class Normalizer(object):
+	"""
+	Replaces wiki links (if wikilinks is True) by their text and every key of table by its value,
+	in a single scan of the text.
+	"""
+
+	def __init__(self, table, wikilinks=True):
+		self.table = dict(table)
+		keys = sorted(self.table, key=len, reverse=True)
+		self.table_pattern = re.compile('|'.join(re.escape(key) for key in keys)) if keys else None
+		alternatives = [re.escape(key) for key in keys]
+		if wikilinks:
+			alternatives.insert(0, WIKILINK)
+		self.pattern = re.compile('|'.join(alternatives))
+		self.wikilinks = wikilinks
+
+	def _replace(self, match):
+		if self.wikilinks and match.lastindex is not None:
+			text = match.group(match.lastindex)
+			if self.table_pattern is not None and self.table_pattern.search(text):
+				text = self.table_pattern.sub(self._replace_key, text)		# rare: markup inside the link text
+			return text
+		return self.table[match.group(0)]
+
+	def _replace_key(self, match):
+		return self.table[match.group(0)]
+
+	def __call__(self, text):
+		if text is None:
+			return None
+		return self.pattern.sub(self._replace, text)
+
+
+def merge(*tables):
+	merged = {}
+	for table in tables:
+		merged.update(table)
+	return merged
+
+
+item_text = Normalizer(merge(ENTITIES, CORRUPTED, DASHES, {'br /': 'br'}))
+"""
+for mod texts of items: wiki links, corruption markup, escaped angle brackets and dashes.
+'<br />' separators become '<br>'.
+"""
+
+link_text = Normalizer(DASHES)
+"""
+for plain texts with wiki links, like the drop restrictions of divination cards.
+"""
+
+link_brackets = Normalizer(merge(DASHES, {'[[': '', ']]': ''}), wikilinks=False)
+"""
+only drops the brackets of wiki links, keeping "[[page|text]]" as "page|text".
+used for the drop areas of divination cards, which are area ids.
+"""
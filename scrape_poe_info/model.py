@@ -0,0 +1,107 @@
+"""
+scrape_poe_info.model - the scraped data as plain records, independent of any output format.
+
+The transforms of each data type build these records; scrape_poe_info.export then renders them
+as AHK, JSON or MessagePack. Texts are stored without AHK escaping (line breaks are real '\\n').
+The records use __slots__ to stay small, since a full scrape holds thousands of them.
+"""
+
+
+class Record(object):
+	__slots__ = ()
+
+	def __init__(self, *args, **kwargs):
+		for name, value in zip(self.__slots__, args):
+			setattr(self, name, value)
+		for name in self.__slots__[len(args):]:
+			setattr(self, name, kwargs.pop(name, None))
+		if kwargs:
+			raise TypeError('unexpected fields for {}: {}'.format(type(self).__name__, ', '.join(kwargs)))
+
+	def __eq__(self, other):
+		return type(self) is type(other) and all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+	def __ne__(self, other):
+		return not self == other
+
+	def __repr__(self):
+		return '{}({})'.format(type(self).__name__, ', '.join('{}={!r}'.format(name, getattr(self, name)) for name in self.__slots__))
+
+	def to_dict(self):
+		return {name: to_plain(getattr(self, name)) for name in self.__slots__}
+
+
+def to_plain(value):
+	"""
+	turns records (also inside lists) into dicts, for the JSON and MessagePack output.
+	"""
+	if isinstance(value, Record):
+		return value.to_dict()
+	if isinstance(value, list):
+		return [to_plain(entry) for entry in value]
+	return value
+
+
+class Mod(Record):
+	"""
+	One mod line of a unique item.
+	values is the rolled range like '80-100' ('' for static mods), or None for lines
+	of the prepared style variants that are plain text, like '<Style Variant>'.
+	"""
+	__slots__ = ('values', 'text')
+
+
+class UniqueItem(Record):
+	"""
+	style_variant is True if the mods come from the manually prepared UniqueStyleVariants.json.
+	page is the title of the item's wiki page, like "Item (variant)" for a style variant (None if unknown).
+	variant_pages are the wiki pages of the style variants a prepared style variant stands for.
+	"""
+	__slots__ = ('name', 'implicits', 'explicits', 'style_variant', 'page', 'variant_pages')
+
+
+class DivinationCard(Record):
+	"""
+	locations_recorded is False if the wiki has no drop areas for the card at all;
+	maps_3_0 are maps only recorded for 3.0 (Atlas of Worlds) that are not in drop_maps.
+	"""
+	__slots__ = ('name', 'locations_recorded', 'drop_maps', 'drop_areas', 'maps_3_0', 'drop_restrictions')
+
+
+class Gem(Record):
+	"""
+	quality_stats are the stats at 20% quality, per_quality the value per 1% quality of each distinct stat.
+	Both are empty if the wiki's quality text could not be parsed.
+	page is the title of the gem's wiki page, which is disambiguated if another page has the name, like "Arc (gem)".
+	"""
+	__slots__ = ('name', 'quality_stats', 'per_quality', 'unit', 'page')
+
+
+class Map(Record):
+	"""
+	produced_by and upgrades_to are None for unique maps, which have no vendor recipe.
+	"""
+	__slots__ = ('name', 'unique', 'tier', 'level', 'tileset', 'produced_by', 'upgrades_to', 'divination_cards', 'description')
+
+
+class StringPool(object):
+	"""
+	Numbers distinct strings in the order they are first seen, e.g. the mod texts of the
+	dictionary-compressed uniques output.
+	"""
+	__slots__ = ('strings', 'indexes')
+
+	def __init__(self):
+		self.strings = []
+		self.indexes = {}
+
+	def index(self, string):
+		position = self.indexes.get(string)
+		if position is None:
+			position = len(self.strings)
+			self.indexes[string] = position
+			self.strings.append(string)
+		return position
+
+	def __len__(self):
+		return len(self.strings)
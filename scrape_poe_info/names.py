@@ -0,0 +1,144 @@
+"""
+scrape_poe_info.names - a precomputed index of the names of a data type, for matching noisy names.
+
+Names copied from the clipboard or read by OCR are often slightly wrong ("Headhuntcr", "Maelstrom of Chaos",
+"Arc (gem)"). A NameIndex maps such a text to the canonical names in two steps:
+
+	1. the normalized text (lower case, no accents or punctuation) is looked up among the canonical names
+	   and their aliases, like disambiguated wiki titles "Item (variant)" or "Spider Lair Map";
+	2. otherwise the names sharing the most trigrams with the text are ranked by their Dice coefficient,
+	   counting only through the posting lists of the text's trigrams instead of comparing every name.
+
+export.export() writes the index of a data type as <output file>.names.json (format 'names'),
+with the names, the normalized keys they are found by and the trigram posting lists:
+
+	{'type': ..., 'generated': ..., 'names': [...], 'keys': [...], 'targets': [name index of each key],
+	 'grams': {trigram: [key index, ...]}}
+"""
+
+import collections, itertools, re, unicodedata
+
+regex_wiki_page_disamb = re.compile(r'([^\(]+) \([^\)]+\)')
+"""
+matches items named "item name (disambiguation)" and stores "item name" as capture group 1.
+this format is used in the wiki to distinguish style variants of items, giving each variant its own page,
+and for gems whose name is also the name of another page, like "Arc (gem)".
+"""
+
+regex_not_alphanumeric = re.compile(r'[^0-9a-z]+')
+
+MIN_SCORE = 0.3
+"""
+matches sharing fewer trigrams than this (as Dice coefficient) are not reported
+"""
+
+
+def split_title(title):
+	"""
+	the name and the disambiguation of a wiki page title: "Item (variant)" -> ("Item", "variant"), "Item" -> ("Item", None)
+	"""
+	match = regex_wiki_page_disamb.match(title)
+	if match is None:
+		return title, None
+	return match.group(1), title[match.end(1) + 2:match.end() - 1]
+
+
+def normalize(text):
+	"""
+	the form names are compared in: lower case, without accents, punctuation and repeated spaces
+	"""
+	text = text.lower()
+	if not text.isascii():
+		text = unicodedata.normalize('NFKD', text)
+		text = ''.join(character for character in text if not unicodedata.combining(character))
+	return regex_not_alphanumeric.sub(' ', text).strip()
+
+
+def trigrams(key):
+	padded = ' ' + key + ' '
+	return {padded[position:position + 3] for position in range(len(padded) - 2)}
+
+
+class NameIndex(object):
+	"""
+	names are the canonical names; keys the normalized names and aliases, each pointing to the
+	name targets[key]; grams the key indexes by trigram.
+	"""
+	__slots__ = ('names', 'keys', 'targets', 'grams', 'exact', 'gram_counts')
+
+	def __init__(self, names, keys, targets, grams):
+		self.names = names
+		self.keys = keys
+		self.targets = targets
+		self.grams = grams
+		self.exact = {key: position for position, key in enumerate(keys)}
+		self.gram_counts = [len(trigrams(key)) for key in keys]
+
+	@classmethod
+	def build(cls, entries):
+		"""
+		the index of entries, an iterable of (canonical name, [aliases])
+		"""
+		names = []
+		name_indexes = {}
+		keys = []
+		targets = []
+		seen = set()
+		for name, aliases in entries:
+			if name not in name_indexes:
+				name_indexes[name] = len(names)
+				names.append(name)
+			for text in [name] + list(aliases):
+				key = normalize(text)
+				if key and key not in seen:		# the first name a key was seen for keeps it
+					seen.add(key)
+					keys.append(key)
+					targets.append(name_indexes[name])
+
+		grams = {}
+		for position, key in enumerate(keys):
+			for gram in sorted(trigrams(key)):		# the same order in every run, whatever the hash seed
+				grams.setdefault(gram, []).append(position)
+		return cls(names, keys, targets, grams)
+
+	@classmethod
+	def from_dict(cls, document):
+		return cls(document['names'], document['keys'], document['targets'], document['grams'])
+
+	def to_dict(self):
+		return {'names': self.names, 'keys': self.keys, 'targets': self.targets, 'grams': self.grams}
+
+	def match(self, text, limit=5, min_score=MIN_SCORE):
+		"""
+		the canonical names best matching text, as a list of (name, score), best first.
+		An exact match of a name or alias has the score 1.0 and is the only result.
+		"""
+		key = normalize(text)
+		position = self.exact.get(key)
+		if position is not None:
+			return [(self.names[self.targets[position]], 1.0)]
+
+		query = trigrams(key)
+		common = collections.Counter(itertools.chain.from_iterable(self.grams.get(gram, ()) for gram in query))
+		# a key with fewer common trigrams than this cannot reach min_score, whatever its length
+		needed = min_score * (len(query) + 1) / 2.0
+
+		best = {}		# the best score per canonical name, over all its keys
+		gram_counts = self.gram_counts
+		targets = self.targets
+		for position, count in [entry for entry in common.items() if entry[1] >= needed]:
+			score = 2.0 * count / (len(query) + gram_counts[position])
+			target = targets[position]
+			if score >= min_score and score > best.get(target, 0):
+				best[target] = score
+		ranked = sorted(best.items(), key=lambda entry: (-entry[1], abs(len(self.names[entry[0]]) - len(text))))
+		return [(self.names[target], round(score, 3)) for target, score in ranked[:limit]]
+
+
+def name_entries(module, records):
+	"""
+	(canonical name, aliases) of records; modules define name_aliases(record) for the aliases of their records
+	"""
+	aliases = getattr(module, 'name_aliases', None)
+	for record in records:
+		yield record.name, aliases(record) if aliases is not None else []
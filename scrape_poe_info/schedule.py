@@ -0,0 +1,338 @@
+"""
+scrape_poe_info.schedule - refreshes each data type and category as often as it actually changes.
+
+Instead of scraping everything on a fixed cron, the data is split into parts that can be fetched
+on their own: every unique item category ('uniques/Belts', ...), the divination cards, the gems and the maps.
+Each time a part is checked, its fetched data is compared with the previous fetch (by sha256), and the
+checks are kept in a state file. From them the change rate of every part is estimated, and it is checked again
+
+	after TARGET_CHANGES / rate	(0.5: about every second check finds something new)
+
+within --min-interval and --max-interval. The wiki requests a check of each part costs are measured too, and if
+the planned checks would need more requests per day than --budget, the intervals are stretched, the most for parts
+that change rarely or are expensive (interval ~ sqrt(cost / rate), which keeps the expected staleness lowest).
+
+A changed part is cached in the state directory and marked pending; its data type is then rebuilt from the
+cached parts and exported like a normal scrape (and recorded with --history-dir). The parts stay pending until
+that succeeds, so a failed export is tried again at the next run, also after a restart. Until a part has been checked a few times,
+its rate is taken from the content changes already recorded in --history-dir, or DEFAULT_RATE.
+
+	scrape-poe-schedule run -o out --history-dir history			check whatever is due, forever
+	scrape-poe-schedule run --once								check what is due now and exit (for cron)
+	scrape-poe-schedule plan									show the rates, intervals and request budget
+"""
+
+import datetime, hashlib, json, math, os, sys, time
+from scrape_poe_info import cli, export, history, transport
+
+DAY = 86400.0
+
+DATA_TYPES = ('uniques', 'cards', 'gems', 'maps')
+STATE_FILE = 'schedule.json'
+
+TARGET_CHANGES = 0.5
+"""
+the expected number of changes of a part between two checks
+"""
+
+DEFAULT_RATE = 1.0 / DAY		# changes per second assumed for a part nothing is known about
+PRIOR_CHECKS = 3				# weight of that assumption, in checks
+MAX_CHECKS = 100				# checks kept per part
+MIN_INTERVAL = 0.25				# hours
+MAX_INTERVAL = 7 * 24.0			# hours
+BUDGET = 2000					# wiki requests per day
+
+DEFAULT_COST = {'uniques': 1, 'cards': 1, 'gems': 2, 'maps': 200}
+"""
+wiki requests per check of a part, until it was measured
+"""
+
+
+def module_of(data_type):
+	import importlib
+	return importlib.import_module('scrape_poe_info.' + data_type)
+
+
+def parts(data_type):
+	"""
+	the names of the parts of data_type: its categories, or only the data type itself
+	"""
+	if data_type in ('uniques', 'cards'):
+		return [data_type + '/' + category for category in module_of(data_type).item_categories]
+	return [data_type]
+
+
+def fetch_part(part):
+	data_type, _, category = part.partition('/')
+	module = module_of(data_type)
+	if category:
+		return module.fetch([category])
+	return module.fetch()
+
+
+def fingerprint(data):
+	return hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def estimate_rate(checks, prior_rate):
+	"""
+	the change rate (per second) of a part from its checks, a list of [seconds since the previous check, changed].
+	A check only sees whether something changed since the previous one, not how often, so the
+	estimator -log((n - X + 0.5) / (n + 0.5)) / I of Cho and Garcia-Molina is used
+	(n checks, X of them with a change, I the mean interval), blended with prior_rate for few checks.
+	"""
+	if not checks:
+		return prior_rate
+	n = len(checks)
+	changed = sum(1 for _, change in checks if change)
+	interval = sum(seconds for seconds, _ in checks) / n
+	if interval <= 0:
+		return prior_rate
+	observed = -math.log((n - changed + 0.5) / (n + 0.5)) / interval
+	weight = n / float(n + PRIOR_CHECKS)
+	return weight * observed + (1 - weight) * prior_rate
+
+
+def history_rate(data_type, history_dir, now=None):
+	"""
+	the change rate of data_type's output file from the versions recorded in history_dir, or None.
+	Only versions whose content changed count (see history.content_sha256), not those that only
+	have a new timestamp, over the time from the first version until now.
+	"""
+	if not history_dir:
+		return None
+	directory = os.path.join(history_dir, module_of(data_type).OUTPUT_FILE)
+	versions = history.load_manifest(directory)['versions']
+	if len(versions) < 2:
+		return None
+	digests = [history.version_content_sha256(directory, version) for version in versions]
+	changes = sum(1 for previous, digest in zip(digests, digests[1:]) if digest != previous)
+	first = datetime.datetime.strptime(versions[0]['created'], '%Y-%m-%dT%H:%M:%S').timestamp()
+	span = (time.time() if now is None else now) - first
+	if changes == 0 or span <= 0:
+		return None
+	return changes / span
+
+
+def plan_intervals(rates, costs, budget, min_interval, max_interval):
+	"""
+	the check interval (seconds) of every part, given their change rates (per second) and costs (requests per check).
+	Each part is checked after TARGET_CHANGES / rate, unless that needs more than budget requests per day;
+	then the intervals are sqrt(cost / rate) * sum(sqrt(cost * rate)) / budget, which meets the budget
+	with the least expected number of missed changes. Both are limited to min_interval and max_interval.
+	"""
+	intervals = {part: TARGET_CHANGES / max(rate, 1e-12) for part, rate in rates.items()}
+	if sum(costs[part] * DAY / interval for part, interval in intervals.items()) > budget:
+		total = sum(math.sqrt(costs[part] * rates[part]) for part in rates)
+		intervals = {part: math.sqrt(costs[part] / max(rates[part], 1e-12)) * total * DAY / budget for part in rates}
+	return {part: min(max(interval, min_interval), max_interval) for part, interval in intervals.items()}
+
+
+class Scheduler(object):
+	"""
+	The state of all parts (their fingerprint, checks and measured cost), kept in state_dir/schedule.json,
+	and the cached data of each part in state_dir/cache.
+	"""
+
+	def __init__(self, state_dir, output_dir='.', formats=None, history_dir=None, budget=BUDGET,
+			min_interval=MIN_INTERVAL * 3600, max_interval=MAX_INTERVAL * 3600, data_types=DATA_TYPES):
+		self.state_dir = state_dir
+		self.output_dir = output_dir
+		self.formats = formats
+		self.history_dir = history_dir
+		self.budget = budget
+		self.min_interval = min_interval
+		self.max_interval = max_interval
+		self.data_types = data_types
+		self.state = {}
+		path = os.path.join(state_dir, STATE_FILE)
+		if os.path.exists(path):
+			with open(path, 'r', encoding='utf-8') as f:
+				self.state = json.load(f)
+		for data_type in data_types:
+			export.check_formats(module_of(data_type), self.formats_of(data_type))
+		self.prior_rates = {}
+		for data_type in data_types:
+			rate = history_rate(data_type, history_dir)
+			self.prior_rates[data_type] = DEFAULT_RATE if rate is None else rate / len(parts(data_type))
+
+	def save(self):
+		os.makedirs(self.state_dir, exist_ok=True)
+		path = os.path.join(self.state_dir, STATE_FILE)
+		with open(path + '.tmp', 'w', encoding='utf-8') as f:
+			json.dump(self.state, f, indent='\t', sort_keys=True)
+		os.replace(path + '.tmp', path)
+
+	def formats_of(self, data_type):
+		return self.formats or getattr(module_of(data_type), 'DEFAULT_FORMATS', cli.DEFAULT_FORMATS)
+
+	def cache_path(self, part):
+		return os.path.join(self.state_dir, 'cache', part.replace('/', os.sep) + '.json')
+
+	def part_state(self, part):
+		return self.state.setdefault(part, {'fingerprint': None, 'checked': None, 'checks': [], 'cost': None, 'retry': None, 'pending': False})
+
+	def all_parts(self):
+		return [part for data_type in self.data_types for part in parts(data_type)]
+
+	def plan(self):
+		"""
+		{part: (rate per second, cost per check, interval in seconds, time of the next check)}
+		"""
+		rates = {}
+		costs = {}
+		for part in self.all_parts():
+			data_type = part.split('/')[0]
+			state = self.part_state(part)
+			rates[part] = estimate_rate(state['checks'], self.prior_rates[data_type])
+			costs[part] = state['cost'] if state['cost'] is not None else DEFAULT_COST[data_type]
+		intervals = plan_intervals(rates, costs, self.budget, self.min_interval, self.max_interval)
+		plan = {}
+		for part in rates:
+			state = self.part_state(part)
+			due = 0 if state['checked'] is None or not os.path.exists(self.cache_path(part)) else state['checked'] + intervals[part]
+			if state.get('retry'):
+				due = max(due, state['retry'])
+			plan[part] = (rates[part], costs[part], intervals[part], due)
+		return plan
+
+	def check(self, part, now=None):
+		"""
+		fetches part, caches it and records the check. Returns True if its data changed.
+		"""
+		state = self.part_state(part)
+		requests_before = transport.shared().stats()['requests']
+		data = fetch_part(part)
+		cost = transport.shared().stats()['requests'] - requests_before
+		now = time.time() if now is None else now
+
+		digest = fingerprint(data)
+		changed = digest != state['fingerprint']
+		if state['checked'] is not None and state['fingerprint'] is not None:
+			state['checks'] = (state['checks'] + [[now - state['checked'], changed]])[-MAX_CHECKS:]
+		state['checked'] = now
+		state['retry'] = None
+		state['fingerprint'] = digest
+		if changed:
+			state['pending'] = True		# until its data type was rebuilt
+		state['cost'] = cost if state['cost'] is None else round(0.8 * state['cost'] + 0.2 * cost, 2)
+		if changed or not os.path.exists(self.cache_path(part)):
+			os.makedirs(os.path.dirname(self.cache_path(part)), exist_ok=True)
+			with open(self.cache_path(part), 'w', encoding='utf-8') as f:
+				json.dump(data, f, ensure_ascii=False)
+		return changed
+
+	def rebuild(self, data_type):
+		"""
+		exports data_type from the cached data of all its parts, like a full scrape would
+		"""
+		module = module_of(data_type)
+		data = []
+		for part in parts(data_type):
+			with open(self.cache_path(part), 'r', encoding='utf-8') as f:
+				data.extend(json.load(f))
+		paths = export.export(module, module.build(data), self.output_dir, self.formats_of(data_type))
+		if self.history_dir:
+			for path in paths.values():
+				history.record(path, self.history_dir)
+		return paths
+
+	def run_due(self, now=None):
+		"""
+		checks every part that is due and rebuilds the data types with pending changes.
+		Returns the time the next part is due.
+		"""
+		now = time.time() if now is None else now
+		plan = self.plan()
+		for part in sorted(plan, key=lambda part: plan[part][3]):
+			if plan[part][3] > now:
+				continue
+			try:
+				changed = self.check(part)
+			except Exception as e:		# e.g. all mirrors down: try again after the shortest interval
+				print('{}: check failed: {!r}'.format(part, e))
+				self.part_state(part)['retry'] = time.time() + self.min_interval
+				continue
+			print('{}: {}'.format(part, 'changed' if changed else 'unchanged'))
+			self.save()
+
+		for data_type in self.data_types:
+			type_parts = parts(data_type)
+			if not any(self.part_state(part).get('pending') for part in type_parts):
+				continue
+			if not all(os.path.exists(self.cache_path(part)) for part in type_parts):
+				continue
+			try:
+				paths = self.rebuild(data_type)
+			except Exception as e:		# the parts stay pending, the rebuild is tried again at the next run
+				print('{}: rebuild failed: {!r}'.format(data_type, e))
+				continue
+			for path in paths.values():
+				print('wrote ' + path)
+			for part in type_parts:
+				self.part_state(part)['pending'] = False
+		self.save()
+		return min(due for _, _, _, due in self.plan().values())
+
+
+def format_interval(seconds):
+	if seconds < 2 * 3600:
+		return '{:.0f} min'.format(seconds / 60)
+	if seconds < 2 * DAY:
+		return '{:.1f} h'.format(seconds / 3600)
+	return '{:.1f} d'.format(seconds / DAY)
+
+
+def print_plan(scheduler):
+	plan = scheduler.plan()
+	now = time.time()
+	print('{:<36} {:>8} {:>12} {:>10} {:>10} {:>12} {:>10}'.format('part', 'checks', 'changes/day', 'requests', 'interval', 'requests/day', 'next'))
+	total = 0
+	for part, (rate, cost, interval, due) in plan.items():
+		checks = scheduler.part_state(part)['checks']
+		per_day = cost * DAY / interval
+		total += per_day
+		print('{:<36} {:>8} {:>12.2f} {:>10} {:>10} {:>12.1f} {:>10}'.format(
+			part, '{}/{}'.format(sum(1 for _, changed in checks if changed), len(checks)), rate * DAY, cost,
+			format_interval(interval), per_day, 'now' if due <= now else format_interval(due - now)))
+	print('{:.0f} of {} requests per day'.format(total, scheduler.budget))
+
+
+def main(argv=None):
+	import argparse
+
+	parser = argparse.ArgumentParser(description='Refreshes each data type and category as often as it changes on the wiki.')
+	parser.add_argument('command', choices=['run', 'plan'], help='run: check the parts that are due; plan: show the schedule')
+	parser.add_argument('-o', '--output-dir', default='.', help='directory the generated files are written to (default: current directory)')
+	parser.add_argument('-f', '--format', nargs='+', choices=export.FORMATS, help='output formats (default: those of each scraper)')
+	parser.add_argument('--history-dir', help='keep the versions of the generated files here; their past changes seed the rates')
+	parser.add_argument('--state-dir', default='schedule', help='where the checks and the fetched parts are kept (default: ./schedule)')
+	parser.add_argument('--types', nargs='+', choices=DATA_TYPES, default=list(DATA_TYPES), help='data types to refresh (default: all)')
+	parser.add_argument('--budget', type=float, default=BUDGET, help='most wiki requests per day (default: {})'.format(BUDGET))
+	parser.add_argument('--min-interval', type=float, default=MIN_INTERVAL, help='hours between checks of a part, at least (default: {})'.format(MIN_INTERVAL))
+	parser.add_argument('--max-interval', type=float, default=MAX_INTERVAL, help='hours between checks of a part, at most (default: {})'.format(MAX_INTERVAL))
+	parser.add_argument('--once', action='store_true', help='check what is due now and exit instead of running forever')
+	parser.add_argument('--http2', action='store_true', help='multiplex requests over HTTP/2 (needs httpx[http2])')
+	args = parser.parse_args(argv)
+
+	try:
+		scheduler = Scheduler(args.state_dir, args.output_dir, args.format, args.history_dir, args.budget,
+			args.min_interval * 3600, args.max_interval * 3600, args.types)
+	except (ValueError, ImportError) as e:
+		parser.error(str(e))
+	if args.command == 'plan':
+		print_plan(scheduler)
+		return 0
+
+	os.makedirs(args.output_dir, exist_ok=True)
+
+	transport.configure(pool_size=module_of('maps').THREADS, http2=args.http2)
+	while True:
+		next_due = scheduler.run_due()
+		if args.once:
+			print(transport.shared().report())
+			return 0
+		wait = max(1.0, next_due - time.time())
+		print('next check in ' + format_interval(wait))
+		sys.stdout.flush()
+		time.sleep(min(wait, 3600))
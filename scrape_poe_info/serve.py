@@ -0,0 +1,336 @@
+"""
+scrape_poe_info.serve - answers name lookups over the scraped data through a local HTTP/JSON API.
+
+The JSON exports of the scrapers (run them with `-f ahk json names`) and their name indexes
+are loaded from one directory into in-memory indexes:
+
+	GET /lookup?name=Headhunter[&type=uniques]		records with exactly this name (case-insensitive)
+	GET /search?prefix=head[&type=uniques][&limit=20]	names starting with prefix, in alphabetical order
+	GET /fuzzy?text=Headhuntcr[&type=uniques][&limit=5]	the best approximate matches, with their score (see scrape_poe_info.names)
+	GET /match-map?text=Superior Spider Lair Map		the map named in an item name, longest name first
+	GET /health										the loaded files, their record counts and the number of reloads
+
+Every record is encoded to JSON once when it is loaded, so a lookup is a dict access and a join of
+bytes. The files are checked for changes every few seconds; a changed file is loaded into a
+new set of indexes in the background, which then replaces the old one in a single assignment.
+Requests that are already running keep using the indexes they started with, so none are dropped,
+and a file that is still being written (not valid JSON yet) is retried at the next check.
+"""
+
+import bisect, importlib, json, os, sys, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from scrape_poe_info import export, names
+
+DATA_TYPES = ('uniques', 'cards', 'gems', 'maps')
+DEFAULT_PORT = 8765
+RELOAD_INTERVAL = 2.0
+SEARCH_LIMIT = 20
+FUZZY_LIMIT = 5
+MAX_SEARCH_LIMIT = 1000
+
+
+def data_paths(data_type, data_dir):
+	"""
+	the JSON export of data_type and its name index
+	"""
+	module = importlib.import_module('scrape_poe_info.' + data_type)
+	return export.output_path(module, data_dir, 'json'), export.output_path(module, data_dir, 'names')
+
+
+def encode(value):
+	return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class Index(object):
+	"""
+	The records of one data type by lower case name, with the names sorted for prefix search.
+	by_name holds the JSON encoded result entries, since records are only ever sent, not changed.
+	"""
+	__slots__ = ('data_type', 'generated', 'count', 'entries', 'by_name', 'names', 'display_names')
+
+	def __init__(self, data_type, document):
+		self.data_type = data_type
+		self.generated = document.get('generated')
+		self.count = len(document['records'])
+		self.entries = []
+		self.by_name = {}
+		self.display_names = {}
+		prefix = b'{"type":' + encode(data_type) + b',"record":'
+		for record in document['records']:
+			entry = prefix + encode(record) + b'}'
+			key = record['name'].lower()
+			self.entries.append(entry)
+			self.by_name.setdefault(key, []).append(entry)
+			self.display_names.setdefault(key, record['name'])
+		self.names = sorted(self.by_name)
+
+	def lookup(self, name):
+		return self.by_name.get(name.lower(), [])
+
+	def search(self, prefix, limit):
+		"""
+		the display names starting with prefix: a binary search for the first one, then a scan while they match
+		"""
+		prefix = prefix.lower()
+		names = self.names
+		found = []
+		position = bisect.bisect_left(names, prefix)
+		while position < len(names) and len(found) < limit and names[position].startswith(prefix):
+			found.append(self.display_names[names[position]])
+			position += 1
+		return found
+
+
+class MapMatcher(object):
+	"""
+	Finds the map named in an item name like "Superior Spider Lair Map" or "Hallowed Ground".
+	The names ("Spider Lair Map" for regular maps, the name itself for unique ones) are looked up
+	as word sequences of every length any name has, longest first, so "Spider Lair Map" wins over "Lair Map"
+	like in the mapMatchList of MapList.txt. That is a few dict lookups per word of the text.
+	"""
+	__slots__ = ('by_name', 'lengths')
+
+	def __init__(self, records, entries):
+		self.by_name = {}
+		for record, entry in zip(records, entries):
+			name = record['name'] if record.get('unique') else record['name'] + ' Map'
+			self.by_name.setdefault(name.lower(), []).append(entry)
+		self.lengths = sorted({len(name.split()) for name in self.by_name}, reverse=True)
+
+	def match(self, text):
+		words = text.lower().split()
+		for length in self.lengths:
+			for start in range(len(words) - length + 1):
+				entries = self.by_name.get(' '.join(words[start:start + length]))
+				if entries:
+					return entries
+		return []
+
+
+class DataSet(object):
+	"""
+	The indexes of all data files found in data_dir, plus the state (mtime and size) of each file
+	they were loaded from. Never changed after it was built; a reload builds a new DataSet.
+	"""
+
+	def __init__(self, data_dir, previous=None):
+		self.data_dir = data_dir
+		self.indexes = {}
+		self.name_indexes = {}
+		self.files = {}
+		self.maps = previous.maps if previous is not None else None
+		for data_type in DATA_TYPES:
+			paths = data_paths(data_type, data_dir)
+			states = tuple(file_state(path) for path in paths)
+			if previous is not None and previous.files.get(data_type) == states and data_type in previous.indexes:
+				self.indexes[data_type] = previous.indexes[data_type]		# unchanged, share the indexes
+				self.name_indexes[data_type] = previous.name_indexes[data_type]
+			elif states[0] is not None:
+				try:
+					self.load(data_type, paths)
+				except ValueError:
+					if previous is None or data_type not in previous.indexes:		# probably still being written
+						continue
+					self.indexes[data_type] = previous.indexes[data_type]
+					self.name_indexes[data_type] = previous.name_indexes[data_type]
+					states = previous.files[data_type]
+			self.files[data_type] = states
+		if 'maps' not in self.indexes:
+			self.maps = None
+
+	def load(self, data_type, paths):
+		"""
+		loads the JSON export of data_type and its name index, or builds a name index of the
+		plain names if the scrape did not write one
+		"""
+		with open(paths[0], 'r', encoding='utf-8') as f:
+			document = json.load(f)
+		index = Index(data_type, document)
+		if os.path.exists(paths[1]):
+			with open(paths[1], 'r', encoding='utf-8') as f:
+				name_index = names.NameIndex.from_dict(json.load(f))
+		else:
+			name_index = names.NameIndex.build((record['name'], []) for record in document['records'])
+		if data_type == 'maps':
+			self.maps = MapMatcher(document['records'], index.entries)
+		self.indexes[data_type] = index
+		self.name_indexes[data_type] = name_index
+
+	def changed(self):
+		return any(tuple(file_state(path) for path in data_paths(data_type, self.data_dir)) != self.files.get(data_type) for data_type in DATA_TYPES)
+
+	def selected(self, data_type):
+		"""
+		the indexes to query: all, or only the one of data_type
+		"""
+		if data_type is None:
+			return list(self.indexes.values())
+		if data_type not in DATA_TYPES:
+			raise ValueError('unknown type: ' + data_type)
+		return [self.indexes[data_type]] if data_type in self.indexes else []
+
+	def fuzzy(self, text, data_type, limit):
+		"""
+		the JSON encoded results of the best approximate matches of text, each with its score
+		"""
+		matches = []
+		for index in self.selected(data_type):
+			for name, score in self.name_indexes[index.data_type].match(text, limit):
+				matches.append((score, index, name))
+		matches.sort(key=lambda match: -match[0])
+		entries = []
+		for score, index, name in matches[:limit]:
+			for entry in index.lookup(name):
+				entries.append(b'{"score":' + encode(score) + b',' + entry[1:])
+		return entries
+
+
+def file_state(path):
+	try:
+		stat = os.stat(path)
+	except OSError:
+		return None
+	return (stat.st_mtime_ns, stat.st_size)
+
+
+class Service(object):
+	"""
+	Holds the current DataSet and replaces it when the data files change.
+	"""
+
+	def __init__(self, data_dir, reload_interval=RELOAD_INTERVAL):
+		self.data_dir = data_dir
+		self.reload_interval = reload_interval
+		self.reloads = 0
+		self.data = DataSet(data_dir)
+		self.stopped = threading.Event()
+
+	def reload(self):
+		"""
+		builds a new DataSet if a file changed and swaps it in. Returns True if it did.
+		"""
+		if not self.data.changed():
+			return False
+		self.data = DataSet(self.data_dir, self.data)
+		self.reloads += 1
+		return True
+
+	def watch(self):
+		while not self.stopped.wait(self.reload_interval):
+			try:
+				if self.reload():
+					print('reloaded data from ' + self.data_dir, file=sys.stderr)
+			except Exception as e:		# keep serving the old data
+				print('reload failed: {!r}'.format(e), file=sys.stderr)
+
+	def start_watching(self):
+		thread = threading.Thread(target=self.watch, name='reload', daemon=True)
+		thread.start()
+		return thread
+
+	def health(self):
+		data = self.data
+		return {
+			'data_dir': os.path.abspath(self.data_dir),
+			'reloads': self.reloads,
+			'types': {data_type: {'records': index.count, 'names': len(index.names), 'generated': index.generated}
+				for data_type, index in data.indexes.items()},
+		}
+
+
+class Handler(BaseHTTPRequestHandler):
+	protocol_version = 'HTTP/1.1'		# keep-alive, the clients send many small requests
+	disable_nagle_algorithm = True		# headers and body are separate writes; don't wait for the client's delayed ACK
+
+	def do_GET(self):
+		url = urlsplit(self.path)
+		query = {key: values[0] for key, values in parse_qs(url.query).items()}
+		data = self.server.service.data		# one DataSet for the whole request, even if a reload swaps it
+		try:
+			if url.path == '/lookup':
+				entries = []
+				for index in data.selected(query.get('type')):
+					entries.extend(index.lookup(required(query, 'name')))
+				self.send_entries(entries)
+			elif url.path == '/search':
+				limit = min(int(query.get('limit', SEARCH_LIMIT)), MAX_SEARCH_LIMIT)
+				results = []
+				for index in data.selected(query.get('type')):
+					results.extend({'type': index.data_type, 'name': name} for name in index.search(required(query, 'prefix'), limit))
+				self.send_json(200, {'results': results[:limit]})
+			elif url.path == '/fuzzy':
+				limit = min(int(query.get('limit', FUZZY_LIMIT)), MAX_SEARCH_LIMIT)
+				self.send_entries(data.fuzzy(required(query, 'text'), query.get('type'), limit))
+			elif url.path == '/match-map':
+				text = required(query, 'text')
+				self.send_entries(data.maps.match(text) if data.maps is not None else [])
+			elif url.path == '/health':
+				self.send_json(200, self.server.service.health())
+			else:
+				self.send_json(404, {'error': 'unknown path: ' + url.path})
+		except ValueError as e:
+			self.send_json(400, {'error': str(e)})
+
+	def send_entries(self, entries):
+		self.send_body(200 if entries else 404, b'{"results":[' + b','.join(entries) + b']}')
+
+	def send_json(self, status, value):
+		self.send_body(status, encode(value))
+
+	def send_body(self, status, body):
+		self.send_response(status)
+		self.send_header('Content-Type', 'application/json; charset=utf-8')
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		if self.server.verbose:
+			BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+def required(query, name):
+	if not query.get(name):
+		raise ValueError('missing parameter: ' + name)
+	return query[name]
+
+
+class Server(ThreadingHTTPServer):
+	daemon_threads = True
+
+	def __init__(self, address, service, verbose=False):
+		ThreadingHTTPServer.__init__(self, address, Handler)
+		self.service = service
+		self.verbose = verbose
+
+
+def main(argv=None):
+	import argparse
+
+	parser = argparse.ArgumentParser(description='Serves name lookups over the JSON exports of the scrapers.')
+	parser.add_argument('-d', '--data-dir', default='.', help='directory with Uniques.json, DivinationCardList.json, ... (default: current directory)')
+	parser.add_argument('--host', default='127.0.0.1', help='address to listen on (default: 127.0.0.1)')
+	parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT, help='port to listen on (default: {})'.format(DEFAULT_PORT))
+	parser.add_argument('--reload-interval', type=float, default=RELOAD_INTERVAL, help='seconds between checks for new data (default: {})'.format(RELOAD_INTERVAL))
+	parser.add_argument('-v', '--verbose', action='store_true', help='log every request')
+	args = parser.parse_args(argv)
+
+	service = Service(args.data_dir, args.reload_interval)
+	if not service.data.indexes:
+		print('no data files in {} (run the scrapers with -f ahk json names)'.format(os.path.abspath(args.data_dir)), file=sys.stderr)
+	for data_type, index in service.data.indexes.items():
+		print('{}: {} records'.format(data_type, index.count))
+	service.start_watching()
+
+	server = Server((args.host, args.port), service, args.verbose)
+	print('serving on http://{}:{}/'.format(args.host, args.port))
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		service.stopped.set()
+		server.server_close()
+	return 0
@@ -0,0 +1,156 @@
+"""
+scrape_poe_info.transport - the one HTTP client all wiki requests go through.
+
+It keeps a pool of keep-alive connections per host, sized to the number of concurrent workers,
+so that the TLS handshake is done once per connection instead of once per map page.
+Responses are requested compressed (gzip, and brotli if the brotli package is installed).
+With http2=True (needs the httpx package with its http2 extra) requests to the same host
+are multiplexed over a single HTTP/2 connection instead.
+
+stats() counts requests, opened/reused connections and the bytes compression saved.
+"""
+
+import threading
+from urllib.parse import urlsplit
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_TIMEOUT = (10, 60)		# seconds to connect, seconds to wait for data
+HOST_TIMEOUTS = {}
+"""
+per host timeouts overriding DEFAULT_TIMEOUT, e.g. {'localhost': (1, 5)} for a local caching proxy.
+"""
+
+USER_AGENT = 'scrape_poe_info (https://github.com/temmings/scrape_poe_info)'
+
+
+def accept_encoding():
+	encodings = ['gzip', 'deflate']
+	for module in ('brotli', 'brotlicffi'):
+		try:
+			__import__(module)
+		except ImportError:
+			continue
+		encodings.append('br')		# urllib3 and httpx decode brotli when one of these is installed
+		break
+	return ', '.join(encodings)
+
+
+class Transport(object):
+	"""
+	A pooled HTTP client. get() is safe to call from several threads.
+	"""
+
+	def __init__(self, pool_size=DEFAULT_POOL_SIZE, http2=False, timeouts=None, default_timeout=DEFAULT_TIMEOUT):
+		self.pool_size = pool_size
+		self.http2 = http2
+		self.timeouts = dict(HOST_TIMEOUTS)
+		if timeouts:
+			self.timeouts.update(timeouts)
+		self.default_timeout = default_timeout
+		self.headers = {'User-Agent': USER_AGENT, 'Accept-Encoding': accept_encoding()}
+		self.lock = threading.Lock()
+		self.request_count = 0
+		self.bytes_received = 0
+		self.bytes_decoded = 0
+
+		if http2:
+			import httpx
+			self.client = httpx.Client(
+				http2=True,
+				headers=self.headers,
+				limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+			)
+		else:
+			import requests
+			self.client = requests.Session()
+			self.client.headers.update(self.headers)
+			adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=pool_size)
+			self.client.mount('http://', adapter)
+			self.client.mount('https://', adapter)
+
+	def timeout_for(self, url):
+		return self.timeouts.get(urlsplit(url).hostname, self.default_timeout)
+
+	def get(self, url):
+		"""
+		Fetches url and returns the response (requests.Response, or httpx.Response with http2).
+		"""
+		timeout = self.timeout_for(url)
+		if self.http2:
+			import httpx
+			r = self.client.get(url, timeout=httpx.Timeout(timeout[1], connect=timeout[0]))
+			received = r.num_bytes_downloaded
+		else:
+			r = self.client.get(url, timeout=timeout)
+			received = r.raw.tell()		# bytes read from the connection, before decompression
+		with self.lock:
+			self.request_count += 1
+			self.bytes_received += received
+			self.bytes_decoded += len(r.content)
+		return r
+
+	def connections_opened(self):
+		"""
+		the number of connections opened so far, or None if the client does not tell (HTTP/2)
+		"""
+		if self.http2:
+			return None
+		opened = 0
+		for adapter in set(self.client.adapters.values()):		# the same adapter serves http and https
+			pools = adapter.poolmanager.pools
+			for key in pools.keys():
+				pool = pools.get(key)
+				if pool is not None:
+					opened += pool.num_connections
+		return opened
+
+	def stats(self):
+		opened = self.connections_opened()
+		with self.lock:
+			return {
+				'requests': self.request_count,
+				'connections_opened': opened,
+				'connections_reused': None if opened is None else max(0, self.request_count - opened),
+				'bytes_received': self.bytes_received,
+				'bytes_decoded': self.bytes_decoded,
+				'bytes_saved': self.bytes_decoded - self.bytes_received,
+			}
+
+	def report(self):
+		stats = self.stats()
+		if stats['connections_opened'] is None:
+			connections = 'HTTP/2'
+		else:
+			connections = '{connections_opened} connections opened, {connections_reused} reused'.format(**stats)
+		return 'HTTP: {} requests, {}, {:.1f} KiB received, {:.1f} KiB saved by compression'.format(
+			stats['requests'], connections, stats['bytes_received'] / 1024, stats['bytes_saved'] / 1024)
+
+	def close(self):
+		self.client.close()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared():
+	"""
+	the transport shared by all scrapers, created with the defaults on first use
+	"""
+	global _shared
+	with _shared_lock:
+		if _shared is None:
+			_shared = Transport()
+	return _shared
+
+
+def configure(**kwargs):
+	"""
+	replaces the shared transport with one created with the given Transport() arguments
+	"""
+	global _shared
+	with _shared_lock:
+		if _shared is not None:
+			_shared.close()
+		_shared = Transport(**kwargs)
+	return _shared
@@ -0,0 +1,489 @@
+"""
+scrape_poe_info.uniques - scrapes poe uniques from the wiki using the API
+and then writes them, in their category, one per line.
+
+fetch() gets the items from the wiki, transform() turns them into lines for Uniques.txt
+and render() writes that file.
+"""
+
+import re, datetime, os, sys
+from scrape_poe_info import cli, export, history, markup, model, names, transport, wiki
+
+DATADIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+OUTPUT_FILE = 'Uniques.txt'
+DEFAULT_FORMATS = ['ahk', 'dict', 'names']		# the dictionary-compressed variant is shipped alongside Uniques.txt
+
+PARALLEL_MIN_ITEMS = 500		# below this, starting the worker processes costs more than it saves
+CHUNKS_PER_PROCESS = 4
+
+item_categories = ['Amulets','Belts','Rings','Quivers','Body Armours','Boots','Gloves','Helmets','Shields','One Hand Axes','Two Hand Axes','Bows','Claws','Daggers','Fishing Rods','One Hand Maces','Sceptres','Two Hand Maces','Staves','One Hand Swords','Thrusting One Hand Swords','Two Hand Swords','Wands','Life Flasks','Mana Flasks','Hybrid Flasks','Utility Flasks','Jewel','Maps']
+
+# Regex magic! I recommend using https://regex101.com to make it more readable.
+
+regex_single_range = re.compile(r'\+?\((-?[\d\.]+-[\d\.]+)\)%?')
+"""
+matches variants of the wiki's "(num-num)" format including the possibly leading "+" and trailing "%", such as:
+	(10-20)
+	+(10-20)
+	(10-20)%
+	(0.6-1)%
+	(0.6-0.8)%
+	(-40-40)%	format found in ventor's gamble's rarity and some "flask charge used" mods
+	+(-25-50)%	ventor's gamble again, now with resistances
+	
+	The "num-num" part inside the brakets is stored as capture group 1
+	
+	It intentionally leaves the leading "-" of mods like "-(20-10) Physical Damage Taken from Attacks"
+	The initial matching of double range damage mods like "Adds (10-20) to (30-40) Type Damage" is done
+	with another expression.
+"""
+
+regex_double_range = re.compile(r'\(?(?P<lowmin>\d+)(?:-(?P<lowmax>\d+)\))? to \(?(?P<highmin>\d+)(?:-(?P<highmax>\d+)\))?')
+"""
+matches the relevant variants for double range damage mods
+(10-20) to (30-40)
+15 to (30-40)
+(10-20) to 35
+15 to 35
+
+Four named capture groups are used: lowmin, lowmax, highmin and highmax (numbers 10, 20, 30 and 40 above)
+lowmax and/or highmax is None if the part is only a number and not a number range (cases 2-4 above; numbers 15 and 35)
+"""
+
+def remove_wiki_formats(text):
+	"""
+	removes wiki links, corruption markup and escaped brackets in one pass, see scrape_poe_info.markup
+	"""
+	return markup.item_text(text)
+
+	
+def clean_up_api_results(api_results):
+	"""
+	Takes the API result and turns it into a list of json objects.
+	Each object gets the keys 'name', 'impl', 'expl' and 'page' (the wiki page title, if the query returned it).
+	At this stage the mods are still full of wiki formatting and
+	technical annotations, like mods marked with '(Hidden)'.
+	Note that the explicit mods of an item are also still in a single string,
+	with '<br>' seperating them.	
+	"""
+	
+	#item_names = list(api_results.keys())
+	#item_names.sort()
+	partial_item_list = []
+	for result in api_results:
+		itemdata = result['title']
+		obj = {}
+		obj['name'] = itemdata['name']
+		impl = itemdata['implicit stat text']		# returns a list with one entry or an empty list
+		if not impl:
+			impl = None
+		obj['impl'] = remove_wiki_formats(impl)
+		expl = itemdata['explicit stat text']	# explicit mods are also in one long entry
+		if not expl:
+			expl = None
+		obj['expl'] = remove_wiki_formats(expl)
+		obj['page'] = itemdata.get('page')
+		partial_item_list.append(obj)
+	
+	return partial_item_list
+	
+	
+def get_api_results(item_category):
+	"""
+	This function gets the wiki data for given unique item categories.
+	It uses the wiki's API and requests json format.
+	See this HTML version for belts to get a better idea how the API response is structured:
+	https://pathofexile.gamepedia.com/api.php?action=askargs&parameters=limit%3D500&conditions=Has%20item%20class::Belts|Has%20rarity::Unique&printouts=Has%20implicit%20stat%20text|Has%20explicit%20stat%20text
+	"""
+	
+	print('Getting data for ' + item_category)
+	r = wiki.get('/api.php?action=cargoquery&format=json&limit=500&tables=items&fields=name%2C_pageName%3Dpage%2Cimplicit_stat_text%2Cexplicit_stat_text&where=rarity%3D%22unique%22+AND+class%3D%22' + item_category + '%22&having=items._pageName&formatversion=1')
+	rj = r.json()
+	api_results = rj['cargoquery']
+	
+	return clean_up_api_results(api_results)
+
+
+def get_wiki_data(item_categories):
+	item_list = []
+	for category in item_categories:
+		item_list.extend(get_api_results(category))
+	
+	return item_list
+
+
+def upcase_first_letter(string):
+	return string[0].upper() + string[1:]
+
+
+def	separate_num_ranges(mod_list):
+	"""
+	Takes a list of mods and modifies the entries to match the desired format for 
+	the PoE Item Info Script's "Uniques.txt" file.
+	This means mods with a randomly rolled range are changed, such as
+	"+(80-100) to maximum Life" into "80-100:To maximum Life"
+	
+	Static mods like "50% increased Global Critical Strike Chance" remain as is.
+	"""
+	
+	new_mod_list = []
+	for mod in mod_list:
+		num_part, text_part = separate_num_range(mod)
+		new_mod_list.append(num_part + ':' + text_part)
+	
+	return new_mod_list
+
+
+def separate_num_range(mod):
+	"""
+	Splits a single mod into its rolled range and the remaining text, see separate_num_ranges().
+	"+(80-100) to maximum Life" -> ("80-100", "To maximum Life")
+	"""
+	
+	num_part = regex_double_range.search(mod)
+	if num_part is not None:
+		lowmin = num_part.group('lowmin')
+		lowmax = num_part.group('lowmax')
+		highmin = num_part.group('highmin')
+		highmax = num_part.group('highmax')
+		if lowmax is None and highmax is None:		# Static case, it is the "Add 15 to 35 Type Damage" format
+			num_part = ''
+			text_part = mod
+		else:
+			if lowmax is None:
+				lowmax = lowmin
+			if highmax is None:
+				highmax = highmin
+			
+			num_part = lowmin +'-'+ lowmax +','+ highmin +'-'+ highmax
+			if not (int(lowmin) <= int(lowmax) and int(lowmax) <= int(highmin) and int(highmin) <= int(highmax)):		# debug stuff
+				print('Double range oddity found. Will be written to file as: ' + num_part)
+			
+			text_part = regex_double_range.sub('', mod).strip().replace('  ', ' ')
+			text_part = upcase_first_letter(text_part)
+		
+		# end of double range section
+
+	else:
+		num_part = regex_single_range.search(mod)
+		if num_part is not None:
+			num_part = num_part.group(1)
+			if num_part[0] == '-':		# if the first number is negative, the output looks like '-10-20'
+				num_part = num_part.replace('-', '-+').replace('-+', '-', 1)
+				# we replace both - with +- and then the first back, which gives us a less ambiguous '-10-+20'
+			
+			text_part = regex_single_range.sub('', mod).strip().replace('  ', ' ')
+			text_part = upcase_first_letter(text_part)
+		else:
+			num_part = ''
+			text_part = mod
+	
+	return num_part, text_part
+
+
+def remove_hidden_mods(mod_list):
+	new_mod_list = []
+	for mod in mod_list:
+		if '(Hidden)' not in mod:			# No '(Hidden)' annotation found
+			new_mod_list.append(mod)		# Thus the mod is passed on
+	
+	return new_mod_list			
+
+
+def load_style_variants():
+	"""
+	the manually prepared formatting for style variant items, as {item name: Uniques.txt line}
+	"""
+	import json
+	
+	with open(os.path.join(DATADIR, 'UniqueStyleVariants.json'), 'r', encoding='cp1252') as f:
+		return json.load(f)
+
+
+def parse_style_variant(mod_line):
+	"""
+	Turns a prepared Uniques.txt line into a UniqueItem. Everything up to the mod marked
+	with '@' is implicit, lines without ':' are kept as plain text mods.
+	"""
+	parts = mod_line.split('|')
+	mods = []
+	implicit_count = 0
+	for part in parts[1:]:
+		if part.startswith('@'):
+			part = part[1:]
+			implicit_count = len(mods) + 1
+		if ':' in part:
+			values, text = part.split(':', 1)
+			mods.append(interned_mod(values, text))
+		else:
+			mods.append(interned_mod(None, part))
+	
+	return model.UniqueItem(parts[0], mods[:implicit_count], mods[implicit_count:], True)
+
+
+def parse_mods(text):
+	"""
+	Turns the '<br>' separated mods of the wiki into a list of Mods, without the hidden ones.
+	"""
+	if not text:
+		return []
+	
+	mod_list = remove_hidden_mods(text.split('<br>'))
+	return [interned_mod(*separate_num_range(mod)) for mod in mod_list]
+
+
+def interned_mod(values, text):
+	"""
+	A Mod whose strings are interned: the same mod text (like "To maximum Life") on hundreds
+	of items is then held in memory only once.
+	"""
+	if values is not None:
+		values = sys.intern(values)
+	return model.Mod(values, sys.intern(text))
+
+
+def build_item(item):
+	"""
+	Turns one item without a prepared style variant into a UniqueItem.
+	"""
+	implicits = parse_mods(item['impl'])
+	if len(implicits) > 1:
+		print('Multiple implicits on item: ' + item['name'])		# print a warning to double check afterwards
+	
+	return model.UniqueItem(item['name'], implicits, parse_mods(item['expl']), False, item.get('page'))
+
+
+def build_item_chunk(chunk):
+	"""
+	Runs build_item() over a chunk of items in a worker process. The warnings each item printed
+	are returned with it, so that the parent can print them in the original order.
+	"""
+	import contextlib, io
+	
+	results = []
+	for item in chunk:
+		output = io.StringIO()
+		with contextlib.redirect_stdout(output):
+			unique_item = build_item(item)
+		results.append((unique_item, output.getvalue()))
+	
+	return results
+
+
+def build_items_in_processes(item_list, processes):
+	"""
+	build_item() for every item, sharded across a pool of processes. Keeps the order of item_list.
+	"""
+	from concurrent.futures import ProcessPoolExecutor
+	
+	chunk_size = max(1, -(-len(item_list) // (processes * CHUNKS_PER_PROCESS)))
+	chunks = [item_list[start:start + chunk_size] for start in range(0, len(item_list), chunk_size)]
+	
+	items = []
+	with ProcessPoolExecutor(max_workers=processes) as executor:
+		for results in executor.map(build_item_chunk, chunks):		# map() returns the chunks in order
+			for unique_item, output in results:
+				sys.stdout.write(output)
+				# strings are not interned across processes, so intern them again here
+				unique_item.implicits = [interned_mod(mod.values, mod.text) for mod in unique_item.implicits]
+				unique_item.explicits = [interned_mod(mod.values, mod.text) for mod in unique_item.explicits]
+				items.append(unique_item)
+	
+	return items
+
+
+def	build_items(item_list, prepared_style_variants=None, processes=1):
+	"""
+	Takes a list of json objects, holding the item informations, and turns them into UniqueItems.
+	Items with a manually prepared style variant are replaced by it, once; the wiki pages
+	of the replaced items are kept as its variant_pages.
+	With processes > 1 the other items are converted in that many worker processes
+	(if there are enough of them to be worth it).
+	"""
+	
+	if prepared_style_variants is None:
+		prepared_style_variants = load_style_variants()
+	
+	items = []
+	style_variant_included = []
+	style_variant_items = {}
+	pending = []		# (position in items, item) of the items that still need to be converted
+		
+	for item in item_list:
+		item_name = item['name']
+		if item_name in prepared_style_variants:
+			if item_name not in style_variant_included:
+				style_variant_items[item_name] = parse_style_variant(prepared_style_variants[item_name])
+				style_variant_items[item_name].variant_pages = []
+				items.append(style_variant_items[item_name])
+				style_variant_included.append(item_name)
+			page = item.get('page')
+			if page is not None and page not in style_variant_items[item_name].variant_pages:
+				style_variant_items[item_name].variant_pages.append(page)
+			continue		# skip the rest of the loop, the style variant was added (now or before)
+		
+		pending.append((len(items), item))
+		items.append(None)
+	
+	pending_items = [item for _, item in pending]
+	if processes > 1 and len(pending_items) >= PARALLEL_MIN_ITEMS:
+		built = build_items_in_processes(pending_items, processes)
+	else:
+		built = [build_item(item) for item in pending_items]
+	for (position, _), unique_item in zip(pending, built):
+		items[position] = unique_item
+	
+	print('\nManually prepared style variants included for these items:\n' + '\n'.join(style_variant_included) + '\n(Make sure they are still correct)\n')
+	
+	return items
+
+
+def format_mod(mod):
+	if mod.values is None:
+		return mod.text
+	return mod.values + ':' + mod.text
+
+
+def ahk_line(item):
+	"""
+	The Uniques.txt line of a UniqueItem. The '@' marks the last implicit mod,
+	so that the script draws a separator line after it.
+	"""
+	mod_line = item.name
+	for index, mod in enumerate(item.implicits):
+		if index == len(item.implicits) - 1:
+			mod_line += '|@'
+		else:
+			mod_line += '|'
+		mod_line += format_mod(mod)
+	
+	for mod in item.explicits:
+		mod_line += '|' + format_mod(mod)
+	
+	return mod_line
+
+
+def dictionary_entry(item, templates):
+	"""
+	The entry of a UniqueItem in the dictionary-compressed output (see export.DictionaryWriter):
+	[name, 1 if style variant else 0, number of implicits, template index, values, template index, values, ...]
+	templates is a model.StringPool of the mod texts.
+	"""
+	entry = [item.name, int(item.style_variant), len(item.implicits)]
+	for mod in item.implicits + item.explicits:
+		entry.append(templates.index(mod.text))
+		entry.append(mod.values)
+	return entry
+
+
+def expand_dictionary_entry(entry, templates):
+	"""
+	Turns an entry of the dictionary-compressed output back into a UniqueItem (without its page). templates is the list of mod texts.
+	"""
+	name, style_variant, implicit_count = entry[0], bool(entry[1]), entry[2]
+	mods = [interned_mod(entry[position + 1], templates[entry[position]]) for position in range(3, len(entry), 2)]
+	return model.UniqueItem(name, mods[:implicit_count], mods[implicit_count:], style_variant)
+
+
+def name_aliases(item):
+	"""
+	The names a UniqueItem can also be looked up by in the name index (see scrape_poe_info.names):
+	its wiki page titles if they are disambiguated, like "Item (variant)" for the pages of its style variants.
+	"""
+	aliases = []
+	for page in [item.page] + (item.variant_pages or []):
+		if page is None or page == item.name or page in aliases:
+			continue
+		aliases.append(page)
+		page_name, disambiguation = names.split_title(page)
+		if disambiguation is not None and page_name != item.name and page_name not in aliases:
+			aliases.append(page_name)
+	return aliases
+
+
+def	convert_to_AHK_script_format(item_list, processes=1):
+	"""
+	Takes a list of json objects, holding the item informations.
+	Parses items one by one and creates a list with text lines in the format
+	for the PoE Item Info Script's "Uniques.txt" file.
+	"""
+	
+	return [ahk_line(item) for item in build_items(item_list, processes=processes)]
+
+
+def define_file_header():
+	"""
+	info header for Uniques.txt
+
+	:return: list
+	"""
+	data = []
+	d = datetime.datetime.now()
+	now_time = d.strftime('%Y-%m-%d at %H:%M:%S')
+	data.append('; Data from https://pathofexile.gamepedia.com/Path_of_Exile_Wiki using the API.')
+	data.append('; The "@" symbol marks a mod as implicit. This means a separator line will be appended after this mod. If there are multiple implicit mods, mark the last one in line.')
+	data.append('; Comments can be made with ";", blank lines will be ignored.')
+	data.append(';')
+	data.append('; This file was auto-generated by scrape_poe_uniques.py on {}'.format(now_time))
+	data.append('\n')
+
+	return data
+
+
+def write_list_to_lines(new_data, path):
+	file = open(path, 'a+b')  # opens file for writing
+	for row in new_data:
+		file.write(row.encode('cp1252'))
+		file.write(b'\n')
+	file.close()
+
+
+def fetch(categories=None):
+	"""
+	Gets the unique items of the given categories (all of them by default) from the wiki.
+	"""
+	if categories is None:
+		categories = item_categories
+	return get_wiki_data(categories)
+
+
+def build(item_list, processes=1):
+	"""
+	Turns the fetched unique items into UniqueItems (see scrape_poe_info.model), for export().
+	processes > 1 shards the conversion across that many worker processes.
+	"""
+	return build_items(item_list, processes=processes)
+
+
+def transform(item_list, processes=1):
+	"""
+	Turns the fetched items into the lines of Uniques.txt, without the file header.
+	"""
+	return convert_to_AHK_script_format(item_list, processes)
+
+
+def render(new_data, output_dir='.'):
+	"""
+	Writes Uniques.txt (header and the transformed lines) into output_dir and returns its path.
+	"""
+	path = os.path.join(output_dir, OUTPUT_FILE)
+	open(path, 'w').close()  # create file (or overwrite it if it exists)
+	write_list_to_lines(define_file_header(), path)
+	write_list_to_lines(new_data, path)
+	return path
+
+
+def main(argv=None):
+	parser = cli.build_parser('Scrapes unique items from the PoE wiki into ' + OUTPUT_FILE + '.')
+	parser.set_defaults(format=DEFAULT_FORMATS)
+	parser.add_argument('-j', '--processes', type=int, default=1, help='convert the items in this many processes, 0 for one per CPU (default: 1)')
+	args = cli.parse_args(None, argv, parser)
+	processes = args.processes or os.cpu_count() or 1
+	transport.configure(http2=args.http2)
+	startTime = datetime.datetime.now()
+	paths = export.export(sys.modules[__name__], build(fetch(), processes), args.output_dir, args.format)
+	if args.history_dir:
+		for path in paths.values():
+			history.record(path, args.history_dir)
+	print(transport.shared().report())
+	print('Program execution time: ',(datetime.datetime.now() - startTime))
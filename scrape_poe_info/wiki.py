@@ -0,0 +1,237 @@
+"""
+scrape_poe_info.wiki - fetches pages from the PoE wiki through a list of equivalent mirrors.
+
+The scrapers used to hard-code pathofexile.gamepedia.com. Now every request goes through
+get(), which sends it to the healthiest mirror and, if that one is slower than usual,
+sends a hedged duplicate to the next mirror and takes whichever answers first.
+The requests themselves go through the shared connection pool of scrape_poe_info.transport.
+
+The paths given to get() are in the layout of pathofexile.gamepedia.com: '/api.php?...' for the API
+and '/<Page>' for articles. Each mirror is configured as "base url|api path|article path" (the last two
+optional, default '/api.php' and '/$1', with $1 standing for the page like in MediaWiki's $wgArticlePath),
+and the paths are translated to its own layout, e.g. '/w/api.php' and '/wiki/<Page>' on www.poewiki.net.
+
+The mirror list can be overridden with the POE_WIKI_MIRRORS environment variable
+(comma separated mirrors), for example to put a local caching proxy in front:
+	POE_WIKI_MIRRORS=http://localhost:8080,https://www.poewiki.net|/w/api.php|/wiki/$1
+"""
+
+import os, time, threading
+from scrape_poe_info import transport
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+
+DEFAULT_MIRRORS = [
+	'https://pathofexile.gamepedia.com',
+	'https://www.poewiki.net|/w/api.php|/wiki/$1',
+]
+
+API_PATH = '/api.php'
+ARTICLE_PATH = '/$1'
+
+HEDGE_PERCENTILE = 0.95
+"""
+a hedged request is sent once the primary takes longer than this percentile of its recent latencies.
+"""
+
+HEDGE_DEFAULT_DELAY = 2.0		# seconds, used until an endpoint has enough latency samples
+HEDGE_MIN_SAMPLES = 5
+
+
+class Endpoint(object):
+	"""
+	One mirror of the wiki, with its API and article paths, together with its recent latencies and failures.
+	"""
+
+	def __init__(self, base_url, api_path=API_PATH, article_path=ARTICLE_PATH):
+		self.base_url = base_url.rstrip('/')
+		self.api_path = api_path
+		self.article_path = article_path
+		self.latencies = deque(maxlen=50)
+		self.successes = 0
+		self.failures = 0
+		self.lock = threading.Lock()
+
+	@classmethod
+	def parse(cls, spec):
+		"""
+		an Endpoint from "base url|api path|article path"; a path left out or empty is the default one
+		"""
+		fields = [field.strip() for field in spec.split('|')] + ['', '']
+		return cls(fields[0], fields[1] or API_PATH, fields[2] or ARTICLE_PATH)
+
+	def url(self, path):
+		"""
+		the url of path (in the layout of the default mirror, see the module docstring) on this mirror
+		"""
+		if path == API_PATH or path.startswith(API_PATH + '?'):
+			return self.base_url + self.api_path + path[len(API_PATH):]
+		return self.base_url + self.article_path.replace('$1', path.lstrip('/'))
+
+	def record(self, latency, ok):
+		with self.lock:
+			if ok:
+				self.successes += 1
+				self.latencies.append(latency)
+			else:
+				self.failures += 1
+
+	def percentile(self, fraction):
+		with self.lock:
+			samples = sorted(self.latencies)
+		if len(samples) < HEDGE_MIN_SAMPLES:
+			return None
+		return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+	def score(self):
+		"""
+		lower is better: the median latency, scaled up by the failure rate.
+		endpoints without samples get a neutral score so that they are tried eventually.
+		"""
+		with self.lock:
+			samples = sorted(self.latencies)
+			attempts = self.successes + self.failures
+			failure_rate = self.failures / attempts if attempts else 0.0
+		median = samples[len(samples) // 2] if samples else HEDGE_DEFAULT_DELAY / 2
+		return median * (1 + 10 * failure_rate)
+
+
+def mirrors_from_environment():
+	value = os.environ.get('POE_WIKI_MIRRORS')
+	if not value:
+		return list(DEFAULT_MIRRORS)
+	return [spec.strip() for spec in value.split(',') if spec.strip()]
+
+
+class MirrorClient(object):
+	"""
+	Sends GET requests to the best mirror and hedges slow ones with a duplicate to the runner-up.
+	"""
+
+	def __init__(self, mirrors=None, hedge_percentile=HEDGE_PERCENTILE):
+		if mirrors is None:
+			mirrors = mirrors_from_environment()
+		if not mirrors:
+			raise ValueError('at least one wiki mirror is required')
+		self.endpoints = [Endpoint.parse(spec) for spec in mirrors]
+		self.hedge_percentile = hedge_percentile
+
+	@property
+	def primary(self):
+		return self.ranked_endpoints()[0]
+
+	def ranked_endpoints(self):
+		# sorted() is stable, so the configured order breaks ties
+		return sorted(self.endpoints, key=lambda e: e.score())
+
+	def hedge_delay(self, endpoint):
+		delay = endpoint.percentile(self.hedge_percentile)
+		if delay is None:
+			return HEDGE_DEFAULT_DELAY
+		return delay
+
+	def _fetch(self, endpoint, path):
+		start = time.monotonic()
+		try:
+			r = transport.shared().get(endpoint.url(path))
+			r.raise_for_status()
+		except Exception:
+			endpoint.record(time.monotonic() - start, False)
+			raise
+		endpoint.record(time.monotonic() - start, True)
+		return r
+
+	def _submit(self, endpoint, path):
+		# daemon threads, so that a losing hedged request never keeps the script from exiting
+		future = Future()
+		def run():
+			try:
+				future.set_result(self._fetch(endpoint, path))
+			except Exception as e:
+				future.set_exception(e)
+		threading.Thread(target=run, daemon=True).start()
+		return future
+
+	def get(self, path):
+		"""
+		Fetches path (e.g. '/api.php?action=cargoquery&...') and returns the requests.Response
+		of whichever mirror answered successfully first.
+		"""
+		if not path.startswith('/'):
+			path = '/' + path
+
+		ranked = self.ranked_endpoints()
+		pending = {self._submit(ranked[0], path)}
+		backups = ranked[1:]
+		last_error = None
+
+		done, pending = wait(pending, timeout=self.hedge_delay(ranked[0]), return_when=FIRST_COMPLETED)
+		while True:
+			for future in done:
+				try:
+					return future.result()
+				except Exception as e:
+					last_error = e
+
+			if backups:		# the primary is slow or failed, so send a hedged duplicate to the next mirror
+				endpoint = backups.pop(0)
+				pending.add(self._submit(endpoint, path))
+				timeout = self.hedge_delay(endpoint)
+			elif pending:
+				timeout = None
+			else:
+				raise last_error
+
+			done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+	def url(self, path):
+		"""
+		the full url of path on the current primary mirror, for file headers and log output.
+		"""
+		return self.primary.url(path)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def client():
+	global _client
+	with _client_lock:
+		if _client is None:
+			_client = MirrorClient()
+	return _client
+
+
+def get(path):
+	return client().get(path)
+
+
+CARGO_PAGE_SIZE = 500		# the most rows the wiki returns for one cargo query
+
+
+def cargo_query(tables, fields, where=None, order_by=None, page_size=CARGO_PAGE_SIZE):
+	"""
+	Yields the results of a cargo query (each {'title': {field: value}}, like the entries of the
+	'cargoquery' list), fetching page_size rows per request with limit and offset until a page comes back short.
+	Only one page is held at a time, so tables of any size can be streamed.
+	Give order_by so that the rows come in a stable order. If the table changes during the scrape,
+	the pages can still overlap or leave out rows, since they are only positions in the result;
+	the caller has to skip the repeated rows.
+	"""
+	from urllib.parse import urlencode
+	
+	offset = 0
+	while True:
+		parameters = [('action', 'cargoquery'), ('format', 'json'), ('limit', page_size), ('offset', offset), ('tables', tables), ('fields', fields)]
+		if where:
+			parameters.append(('where', where))
+		if order_by:
+			parameters.append(('order_by', order_by))
+		parameters.append(('formatversion', 1))
+		results = get('/api.php?' + urlencode(parameters)).json()['cargoquery']
+		for result in results:
+			yield result
+		if len(results) < page_size:
+			return
+		offset += len(results)
@@ -0,0 +1,61 @@
+"""
+fixtures shared by the tests
+"""
+
+import datetime, json, os
+
+import pytest
+
+from scrape_poe_info import cards, gems, maps, uniques
+
+FIXTUREDIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+
+def load_fixture(name):
+	with open(os.path.join(FIXTUREDIR, name), 'r', encoding='utf-8') as f:
+		return json.load(f)
+
+
+def cargo_rows(name):
+	return load_fixture(name)['cargoquery']
+
+
+BUILDERS = {
+	'uniques': lambda: uniques.build(uniques.clean_up_api_results(cargo_rows('uniques_cargo.json'))),
+	'cards': lambda: cards.build(cards.clean_up_api_results(cargo_rows('cards_cargo.json'))),
+	'gems': lambda: gems.build(gems.clean_up_api_results(cargo_rows('gems_cargo.json'))),
+	'maps': lambda: maps.build(load_fixture('maps.json')),
+}
+
+
+@pytest.fixture
+def fixture_rows():
+	"""
+	the rows of a cargo API response in benchmarks/fixtures: fixture_rows('gems_cargo.json')
+	"""
+	return cargo_rows
+
+
+@pytest.fixture
+def fixture_records():
+	"""
+	builds the records of a data type from the wiki responses in benchmarks/fixtures: fixture_records('cards')
+	"""
+	return lambda data_type: BUILDERS[data_type]()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+	"""
+	sets the time datetime.datetime.now() returns: clock(2020, 1, 1, 12)
+	"""
+	def set_time(*args):
+		moment = datetime.datetime(*args)
+
+		class Clock(datetime.datetime):
+			@classmethod
+			def now(cls, tz=None):
+				return moment
+
+		monkeypatch.setattr(datetime, 'datetime', Clock)
+	return set_time
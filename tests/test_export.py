@@ -0,0 +1,58 @@
+"""
+tests for scrape_poe_info.export, on records built from the benchmark fixtures
+"""
+
+import json
+
+import pytest
+
+from scrape_poe_info import cards, export, gems, maps, uniques
+
+MODULES = [uniques, cards, gems, maps]
+
+
+@pytest.mark.parametrize('module', MODULES, ids=export.data_type)
+def test_json_records_are_the_records(tmp_path, fixture_records, module):
+	records = fixture_records(export.data_type(module))
+	path = export.export(module, records, str(tmp_path), ['json'])['json']
+	with open(path, 'r', encoding='utf-8') as f:
+		document = json.load(f)
+	assert document['type'] == export.data_type(module)
+	assert document['records'] == [record.to_dict() for record in records]
+
+
+@pytest.mark.parametrize('module', MODULES, ids=export.data_type)
+def test_msgpack_records_are_the_records(tmp_path, fixture_records, module):
+	msgpack = pytest.importorskip('msgpack')
+	records = fixture_records(export.data_type(module))
+	path = export.export(module, records, str(tmp_path), ['msgpack'])['msgpack']
+	with open(path, 'rb') as f:
+		document = msgpack.unpackb(f.read(), raw=False)
+	assert document['type'] == export.data_type(module)
+	assert document['records'] == [record.to_dict() for record in records]
+
+
+def test_dictionary_entries_expand_to_the_items(tmp_path, fixture_records):
+	records = fixture_records('uniques')
+	path = export.export(uniques, records, str(tmp_path), ['dict'])['dict']
+	with open(path, 'r', encoding='utf-8') as f:
+		document = json.load(f)
+	expanded = [uniques.expand_dictionary_entry(entry, document['templates']) for entry in document['items']]
+	assert [uniques.ahk_line(item) for item in expanded] == [uniques.ahk_line(record) for record in records]
+	assert [(item.name, item.style_variant, item.implicits, item.explicits) for item in expanded] == \
+		[(record.name, record.style_variant, record.implicits, record.explicits) for record in records]
+
+
+def test_ahk_output_is_what_render_writes(tmp_path, fixture_records):
+	records = fixture_records('cards')
+	path = export.export(cards, records, str(tmp_path), ['ahk'])['ahk']
+	with open(path, 'r', encoding='cp1252') as f:
+		lines = f.read().split('\n')
+	assert lines[-len(records) - 1:] == [cards.ahk_line(record) for record in records] + ['']
+
+
+def test_unknown_formats_are_rejected(tmp_path, fixture_records):
+	with pytest.raises(ValueError):
+		export.export(cards, fixture_records('cards'), str(tmp_path), ['xml'])
+	with pytest.raises(ValueError):
+		export.export(cards, fixture_records('cards'), str(tmp_path), ['dict'])
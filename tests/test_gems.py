@@ -0,0 +1,38 @@
+"""
+tests for the gem level table
+"""
+
+from scrape_poe_info import gems
+
+
+def level_rows(page, levels):
+	return [{'title': {'name': page, 'level': str(level)}} for level in levels]
+
+
+def test_rows_repeated_across_pages_are_skipped():
+	# the second cargo page starts two rows early, because a row was inserted before it during the scrape
+	first_page = level_rows('Arc', range(1, 11)) + level_rows('Arc (gem)', [1, 2])
+	second_page = level_rows('Arc', [10]) + level_rows('Arc (gem)', [1, 2, 3]) + level_rows('Vaal Arc', [1])
+	table = gems.ingest_levels(gems.LevelTable(), first_page + second_page)
+
+	assert len(table) == 14
+	assert [table.levels[row] for row in table.rows('Arc')] == list(range(1, 11))
+	assert [table.levels[row] for row in table.rows('Arc (gem)')] == [1, 2, 3]
+	assert [table.levels[row] for row in table.rows('Vaal Arc')] == [1]
+
+
+def test_rows_out_of_order_are_skipped(capsys):
+	results = level_rows('Arc', [1, 2]) + level_rows('Vaal Arc', [1]) + level_rows('Arc', [3])
+	table = gems.ingest_levels(gems.LevelTable(), results)
+
+	assert [table.levels[row] for row in table.rows('Arc')] == [1, 2]
+	assert 'Skipping level 3 of Arc' in capsys.readouterr().out
+
+
+def test_gems_repeated_across_pages_are_kept_once():
+	def quality_rows(*pages):
+		return [{'title': {'name': page, 'quality stat text': '+1% increased Damage'}} for page in pages]
+
+	gem_list = gems.clean_up_api_results(quality_rows('Arc', 'Arc (gem)') + quality_rows('Arc (gem)', 'Vaal Arc'))
+	assert [gem['name'] for gem in gem_list] == ['Arc', 'Arc (gem)', 'Vaal Arc']
+	assert len(gems.convert_to_AHK_script_format(gem_list)) == 3
@@ -0,0 +1,77 @@
+"""
+tests for scrape_poe_info.history, on exports of the benchmark fixtures
+"""
+
+import os
+
+import pytest
+
+from scrape_poe_info import cards, export, history
+
+FORMATS = ['ahk', 'json', 'msgpack', 'names']
+
+
+def test_identical_exports_record_one_version(tmp_path, clock, fixture_records):
+	pytest.importorskip('msgpack')
+	records = fixture_records('cards')
+	output_dir = str(tmp_path)
+	history_dir = str(tmp_path / 'history')
+
+	clock(2020, 1, 1, 12, 0, 0)
+	paths = export.export(cards, records, output_dir, FORMATS)
+	first = {fmt: open(path, 'rb').read() for fmt, path in paths.items()}
+	for path in paths.values():
+		assert history.record(path, history_dir) is not None
+
+	clock(2020, 1, 2, 12, 30, 15)
+	paths = export.export(cards, records, output_dir, FORMATS)
+	for fmt, path in paths.items():
+		assert open(path, 'rb').read() != first[fmt]
+		assert history.record(path, history_dir) is None
+		assert open(path, 'rb').read() == first[fmt]		# reset to the recorded version
+		versions = history.load_manifest(os.path.join(history_dir, os.path.basename(path)))['versions']
+		assert len(versions) == 1
+
+
+def test_changed_export_records_a_version(tmp_path, clock, fixture_records):
+	records = fixture_records('cards')
+	output_dir = str(tmp_path)
+	history_dir = str(tmp_path / 'history')
+
+	clock(2020, 1, 1, 12, 0, 0)
+	path = export.export(cards, records, output_dir, ['ahk'])['ahk']
+	history.record(path, history_dir)
+	clock(2020, 1, 2, 12, 0, 0)
+	path = export.export(cards, records[1:], output_dir, ['ahk'])['ahk']
+	entry = history.record(path, history_dir)
+	assert entry['version'] == 2
+	assert entry['patch'] is not None
+
+
+def test_patches_round_trip(tmp_path, clock, fixture_records):
+	records = fixture_records('cards')
+	output_dir = str(tmp_path)
+	history_dir = str(tmp_path / 'history')
+
+	contents = []
+	for day, selection in enumerate([records, records[2:], records[2:] + records[:1]], 1):
+		clock(2020, 1, day, 12, 0, 0)
+		path = export.export(cards, selection, output_dir, ['ahk'])['ahk']
+		history.record(path, history_dir)
+		contents.append(open(path, 'rb').read())
+
+	directory = os.path.join(history_dir, os.path.basename(path))
+	versions = history.load_manifest(directory)['versions']
+	assert [version['version'] for version in versions] == [1, 2, 3]
+	for version, old, new in zip(versions[1:], contents, contents[1:]):
+		assert history.apply_patch(old, history.read_patch(os.path.join(directory, version['patch']))) == new
+
+	client = str(tmp_path / 'client.txt')
+	with open(client, 'wb') as f:
+		f.write(contents[0])
+	assert history.update(client, directory) == 2
+	assert open(client, 'rb').read() == contents[-1]
+	assert history.update(client, directory) == 0
+
+	with pytest.raises(history.PatchError):
+		history.apply_patch(contents[0], history.read_patch(os.path.join(directory, versions[2]['patch'])))
@@ -0,0 +1,48 @@
+"""
+tests for scrape_poe_info.names
+"""
+
+import os, subprocess, sys
+
+from scrape_poe_info import names
+
+REPODIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTUREDIR = os.path.join(REPODIR, 'benchmarks', 'fixtures')
+
+EXPORT_SCRIPT = '''
+import datetime, json, os, sys
+
+class Clock(datetime.datetime):
+	@classmethod
+	def now(cls, tz=None):
+		return cls(2020, 1, 1, 12)
+
+datetime.datetime = Clock
+
+from scrape_poe_info import export, uniques
+
+fixture_dir, output_dir = sys.argv[1:]
+with open(os.path.join(fixture_dir, 'uniques_cargo.json'), 'r', encoding='utf-8') as f:
+	records = uniques.build(uniques.clean_up_api_results(json.load(f)['cargoquery']))
+sys.stdout.write(export.export(uniques, records, output_dir, ['names'])['names'])
+'''
+
+
+def test_name_index_files_do_not_depend_on_the_hash_seed(tmp_path):
+	contents = []
+	for seed in ('1', '2', '3'):
+		output_dir = tmp_path / seed
+		output_dir.mkdir()
+		environment = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=REPODIR)
+		result = subprocess.run([sys.executable, '-c', EXPORT_SCRIPT, FIXTUREDIR, str(output_dir)],
+			env=environment, stdout=subprocess.PIPE, check=True, universal_newlines=True)
+		with open(result.stdout.splitlines()[-1], 'rb') as f:
+			contents.append(f.read())
+	assert contents[0] == contents[1] == contents[2]
+
+
+def test_aliases_and_noisy_names_find_the_canonical_name():
+	index = names.NameIndex.build([('Arc', ['Arc (gem)']), ('Arctic Armour', []), ('Headhunter', [])])
+	assert index.match('arc (GEM)') == [('Arc', 1.0)]
+	assert index.match('Headhuntcr')[0][0] == 'Headhunter'
+	assert index.match('xyz') == []
@@ -0,0 +1,92 @@
+"""
+tests for the change rates the scheduler starts from
+"""
+
+import datetime, gzip, json, os
+
+import pytest
+
+from scrape_poe_info import cards, export, gems, history, schedule
+
+
+def timestamp(*args):
+	return datetime.datetime(*args).timestamp()
+
+
+def test_exports_without_changes_give_no_rate(tmp_path, clock, fixture_records):
+	records = fixture_records('cards')
+	history_dir = str(tmp_path / 'history')
+	for second in range(3):
+		clock(2020, 1, 1, 12, 0, second)
+		history.record(export.export(cards, records, str(tmp_path), ['ahk'])['ahk'], history_dir)
+
+	assert schedule.history_rate('cards', history_dir, timestamp(2020, 1, 1, 12, 0, 3)) is None
+
+
+def test_versions_recorded_for_new_timestamps_are_not_changes(tmp_path, clock, fixture_records):
+	# histories recorded before content_sha256 have a version for every export
+	records = fixture_records('cards')
+	directory = tmp_path / 'history' / cards.OUTPUT_FILE
+	(directory / 'versions').mkdir(parents=True)
+	versions = []
+	for second in range(3):
+		clock(2020, 1, 1, 12, 0, second)
+		with open(export.export(cards, records, str(tmp_path), ['ahk'])['ahk'], 'rb') as f:
+			content = f.read()
+		with gzip.open(str(directory / 'versions' / (history.sha256(content) + '.gz')), 'wb') as f:
+			f.write(content)
+		versions.append({'version': second + 1, 'sha256': history.sha256(content), 'created': '2020-01-01T12:00:0{}'.format(second)})
+	with open(str(directory / history.MANIFEST), 'w', encoding='utf-8') as f:
+		json.dump({'file': cards.OUTPUT_FILE, 'versions': versions}, f)
+
+	assert schedule.history_rate('cards', str(tmp_path / 'history'), timestamp(2020, 1, 1, 12, 0, 3)) is None
+
+
+def test_content_changes_give_the_rate(tmp_path, clock, fixture_records):
+	records = fixture_records('cards')
+	history_dir = str(tmp_path / 'history')
+	for day, selection in enumerate([records, records[1:], records[1:], records[2:]], 1):
+		clock(2020, 1, day, 12, 0, 0)
+		history.record(export.export(cards, selection, str(tmp_path), ['ahk'])['ahk'], history_dir)
+
+	rate = schedule.history_rate('cards', history_dir, timestamp(2020, 1, 5, 12, 0, 0))
+	assert abs(rate * schedule.DAY - 2 / 4.0) < 1e-9
+
+
+@pytest.fixture
+def fetched_gems(monkeypatch, fixture_rows):
+	"""
+	makes the checks fetch the gems of the fixture instead of asking the wiki
+	"""
+	gem_list = gems.clean_up_api_results(fixture_rows('gems_cargo.json'))
+	monkeypatch.setattr(schedule, 'fetch_part', lambda part: gem_list)
+	return gem_list
+
+
+def test_formats_a_data_type_cannot_export_are_rejected(tmp_path):
+	with pytest.raises(ValueError):
+		schedule.Scheduler(str(tmp_path / 'state'), str(tmp_path), ['ahk', 'dict'], data_types=('cards',))
+	with pytest.raises(SystemExit):
+		schedule.main(['plan', '--state-dir', str(tmp_path / 'state'), '-f', 'ahk', 'dict', '--types', 'cards'])
+
+
+def test_failed_rebuilds_are_tried_again_after_a_restart(tmp_path, fetched_gems):
+	state_dir = str(tmp_path / 'state')
+	output_dir = str(tmp_path / 'out')		# does not exist, so the export fails
+	scheduler = schedule.Scheduler(state_dir, output_dir, ['ahk'], data_types=('gems',))
+	scheduler.run_due()
+	assert scheduler.part_state('gems')['pending']
+	assert not os.path.exists(output_dir)
+
+	os.makedirs(output_dir)
+	restarted = schedule.Scheduler(state_dir, output_dir, ['ahk'], data_types=('gems',))
+	assert restarted.part_state('gems')['pending']
+	restarted.run_due(now=0)		# nothing is due, but the pending rebuild is done
+	assert not restarted.part_state('gems')['pending']
+	assert os.path.exists(os.path.join(output_dir, gems.OUTPUT_FILE))
+
+
+def test_run_creates_the_output_dir(tmp_path, fetched_gems):
+	output_dir = str(tmp_path / 'out')
+	assert schedule.main(['run', '--once', '-o', output_dir, '--state-dir', str(tmp_path / 'state'), '--types', 'gems', '-f', 'ahk']) == 0
+	assert os.path.exists(os.path.join(output_dir, gems.OUTPUT_FILE))
@@ -0,0 +1,168 @@
+"""
+tests for scrape_poe_info.serve, running the server on an ephemeral port over the exported fixtures
+"""
+
+import json, os, threading, time
+from urllib.parse import urlencode
+
+import pytest
+import requests
+
+from scrape_poe_info import cards, export, gems, maps, serve, uniques
+
+MODULES = [uniques, cards, gems, maps]
+
+
+@pytest.fixture
+def data_dir(tmp_path, fixture_records):
+	for module in MODULES:
+		export.export(module, fixture_records(export.data_type(module)), str(tmp_path), ['json', 'names'])
+	return str(tmp_path)
+
+
+@pytest.fixture
+def service(data_dir):
+	return serve.Service(data_dir)
+
+
+@pytest.fixture
+def get(service):
+	"""
+	get('/lookup', name='Headhunter') -> (status, decoded JSON body)
+	"""
+	server = serve.Server(('127.0.0.1', 0), service)
+	threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+	session = requests.Session()
+	base_url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+
+	def request(path, **query):
+		response = session.get(base_url + path + ('?' + urlencode(query) if query else ''))
+		return response.status_code, response.json()
+	yield request
+	session.close()
+	server.shutdown()
+	server.server_close()
+
+
+def rewrite(path, text):
+	"""
+	writes text to path and moves its mtime on, so the change is seen even within the resolution of the clock
+	"""
+	state = os.stat(path)
+	with open(path, 'w', encoding='utf-8') as f:
+		f.write(text)
+	os.utime(path, ns=(state.st_atime_ns, state.st_mtime_ns + 10 ** 9))
+
+
+def test_lookup(get):
+	status, body = get('/lookup', name='headhunter')
+	assert status == 200
+	assert [(result['type'], result['record']['name']) for result in body['results']] == [('uniques', 'Headhunter')]
+
+	status, body = get('/lookup', name='The Doctor', type='uniques')
+	assert (status, body) == (404, {'results': []})
+
+
+def test_search(get):
+	status, body = get('/search', prefix='doryani')
+	assert status == 200
+	assert body['results'] == [
+		{'type': 'uniques', 'name': "Doryani's Invitation"},
+		{'type': 'uniques', 'name': "Doryani's Invitation (Fire)"},
+	]
+	status, body = get('/search', prefix='the', type='cards', limit=2)
+	assert body['results'] == [{'type': 'cards', 'name': 'The Doctor'}, {'type': 'cards', 'name': 'The Enlightened'}]
+
+
+def test_fuzzy(get):
+	status, body = get('/fuzzy', text='Headhuntcr')
+	assert status == 200
+	assert body['results'][0]['record']['name'] == 'Headhunter'
+	assert 0 < body['results'][0]['score'] < 1
+
+	status, body = get('/fuzzy', text="Atziri's Splendour (Armour/Evasion)")
+	assert [(result['record']['name'], result['score']) for result in body['results']] == [("Atziri's Splendour", 1.0)]
+
+
+def test_match_map(get):
+	status, body = get('/match-map', text='Superior Spider Lair Map')
+	assert status == 200
+	assert [result['record']['name'] for result in body['results']] == ['Spider Lair']
+
+	status, body = get('/match-map', text="Olmec's Sanctum")
+	assert [result['record']['name'] for result in body['results']] == ["Olmec's Sanctum"]
+
+
+def test_health(get, data_dir, fixture_records):
+	status, body = get('/health')
+	assert status == 200
+	assert body['data_dir'] == os.path.abspath(data_dir)
+	assert body['reloads'] == 0
+	assert {data_type: entry['records'] for data_type, entry in body['types'].items()} == \
+		{data_type: len(fixture_records(data_type)) for data_type in serve.DATA_TYPES}
+
+
+@pytest.mark.parametrize('path, query', [
+	('/lookup', {}),
+	('/lookup', {'name': 'Headhunter', 'type': 'armour'}),
+	('/search', {}),
+	('/search', {'prefix': 'head', 'limit': 'many'}),
+	('/fuzzy', {'text': ''}),
+	('/match-map', {}),
+])
+def test_bad_requests(get, path, query):
+	status, body = get(path, **query)
+	assert status == 400
+	assert body['error']
+
+
+def test_unknown_path(get):
+	assert get('/records')[0] == 404
+
+
+def test_hot_reload(get, service, data_dir):
+	path = export.output_path(cards, data_dir, 'json')
+	with open(path, 'r', encoding='utf-8') as f:
+		document = json.load(f)
+	document['records'][0]['name'] = 'The Doctor Reloaded'
+	text = json.dumps(document, ensure_ascii=False)
+
+	rewrite(path, text[:len(text) // 2])		# still being written: the old data is served
+	assert service.reload()
+	assert get('/lookup', name='The Doctor')[0] == 200
+	assert get('/lookup', name='The Doctor Reloaded')[0] == 404
+	assert get('/health')[1]['types']['cards']['records'] == len(document['records'])
+
+	rewrite(path, text)
+	assert service.reload()
+	assert get('/lookup', name='The Doctor')[0] == 404
+	assert get('/lookup', name='The Doctor Reloaded')[0] == 200
+	assert get('/health')[1]['reloads'] == 2
+	assert not service.reload()
+
+
+def test_watcher_swaps_in_changed_files(get, service, data_dir):
+	service.reload_interval = 0.05
+	service.start_watching()
+	path = export.output_path(cards, data_dir, 'json')
+	with open(path, 'r', encoding='utf-8') as f:
+		document = json.load(f)
+	document['records'] = document['records'][:1]
+	rewrite(path, json.dumps(document))
+
+	deadline = time.monotonic() + 5
+	try:
+		while get('/health')[1]['types']['cards']['records'] != 1:
+			assert time.monotonic() < deadline, 'the changed file was not reloaded'
+			time.sleep(0.05)
+	finally:
+		service.stopped.set()
+
+
+def test_files_appearing_later_are_loaded(tmp_path, fixture_records):
+	service = serve.Service(str(tmp_path))
+	assert service.data.indexes == {}
+	export.export(cards, fixture_records('cards'), str(tmp_path), ['json'])
+	assert service.reload()
+	assert service.data.indexes['cards'].lookup('the doctor')
+	assert service.data.fuzzy('The Doctr', 'cards', 1)
@@ -0,0 +1,71 @@
+"""
+tests for scrape_poe_info.transport, against a local keep-alive server answering with gzip
+"""
+
+import gzip, threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scrape_poe_info import transport
+
+BODY = b'{"cargoquery": []}' + b' ' * 5000
+
+
+class Handler(BaseHTTPRequestHandler):
+	protocol_version = 'HTTP/1.1'		# keeps the connection open between requests
+	disable_nagle_algorithm = True
+
+	def do_GET(self):
+		body = BODY
+		gzipped = 'gzip' in self.headers.get('Accept-Encoding', '')
+		if gzipped:
+			body = gzip.compress(BODY)
+		self.send_response(200)
+		if gzipped:
+			self.send_header('Content-Encoding', 'gzip')
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass
+
+
+@pytest.fixture
+def server_url():
+	server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+	server.daemon_threads = True
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	yield 'http://127.0.0.1:{}'.format(server.server_address[1])
+	server.shutdown()
+	server.server_close()
+
+
+def test_sequential_requests_reuse_one_connection(server_url):
+	client = transport.Transport(pool_size=4)
+	for number in range(5):
+		assert client.get(server_url + '/page{}'.format(number)).content == BODY
+	stats = client.stats()
+	client.close()
+
+	assert stats['requests'] == 5
+	assert stats['connections_opened'] == 1
+	assert stats['connections_reused'] == 4
+	assert stats['bytes_received'] == 5 * len(gzip.compress(BODY))
+	assert stats['bytes_decoded'] == 5 * len(BODY)
+	assert stats['bytes_saved'] == 5 * (len(BODY) - len(gzip.compress(BODY)))
+
+
+def test_concurrent_requests_open_at_most_pool_size_connections(server_url):
+	client = transport.Transport(pool_size=2)
+	with ThreadPoolExecutor(max_workers=2) as executor:
+		responses = list(executor.map(lambda number: client.get(server_url + '/page{}'.format(number)), range(20)))
+	stats = client.stats()
+	client.close()
+
+	assert all(response.content == BODY for response in responses)
+	assert stats['requests'] == 20
+	assert 1 <= stats['connections_opened'] <= 2
+	assert stats['connections_reused'] == 20 - stats['connections_opened']
@@ -0,0 +1,48 @@
+"""
+tests for the unique items, on the cargo API response in benchmarks/fixtures
+"""
+
+import json, os
+
+from scrape_poe_info import names, uniques
+
+FIXTUREDIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+
+def load_items():
+	with open(os.path.join(FIXTUREDIR, 'uniques_cargo.json'), 'r', encoding='utf-8') as f:
+		return uniques.build_items(uniques.clean_up_api_results(json.load(f)['cargoquery']))
+
+
+def test_style_variant_pages_are_aliases():
+	items = {item.name: item for item in load_items()}
+	atziri = items["Atziri's Splendour"]
+	assert atziri.style_variant
+	assert atziri.variant_pages == ["Atziri's Splendour (Armour/Evasion)", "Atziri's Splendour (Armour/Energy Shield)"]
+
+	index = names.NameIndex.build(names.name_entries(uniques, items.values()))
+	assert index.match("Atziri's Splendour (Armour/Evasion)") == [("Atziri's Splendour", 1.0)]
+	assert index.match("Atziri's Splendour (Armour/Energy Shield)") == [("Atziri's Splendour", 1.0)]
+	assert index.match("Doryani's Invitation (Physical)") == [("Doryani's Invitation", 1.0)]
+
+
+def test_parallel_build_matches_the_sequential_one(monkeypatch, capsys):
+	with open(os.path.join(FIXTUREDIR, 'uniques_cargo.json'), 'r', encoding='utf-8') as f:
+		rows = uniques.clean_up_api_results(json.load(f)['cargoquery'])
+	# several copies under other names, so that the items and their warnings are spread over the chunks
+	item_list = [dict(row, name=row['name'] + suffix) for suffix in ('', ' II', ' III', ' IV') for row in rows]
+	monkeypatch.setattr(uniques, 'PARALLEL_MIN_ITEMS', 1)
+	pool_runs = []
+	in_processes = uniques.build_items_in_processes
+	monkeypatch.setattr(uniques, 'build_items_in_processes', lambda *args: pool_runs.append(args) or in_processes(*args))
+
+	sequential = uniques.build(item_list)
+	sequential_output = capsys.readouterr().out
+	parallel = uniques.build(item_list, processes=3)
+	parallel_output = capsys.readouterr().out
+
+	assert len(pool_runs) == 1
+	assert parallel == sequential
+	assert [uniques.ahk_line(item) for item in parallel] == [uniques.ahk_line(item) for item in sequential]
+	assert parallel_output == sequential_output
+	assert sequential_output.count('Multiple implicits on item') == 4
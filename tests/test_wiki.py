@@ -0,0 +1,117 @@
+"""
+tests for scrape_poe_info.wiki, against local http.server stand-ins for the wiki mirrors
+"""
+
+import threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from scrape_poe_info import wiki
+
+
+class StandIn(object):
+	"""
+	a local mirror answering every GET with its name after delay seconds, or with status if it is not 200
+	"""
+
+	def __init__(self, name, delay=0.0, status=200):
+		self.name = name
+		self.delay = delay
+		self.status = status
+		self.paths = []
+		stand_in = self
+
+		class Handler(BaseHTTPRequestHandler):
+			def do_GET(self):
+				stand_in.paths.append(self.path)
+				time.sleep(stand_in.delay)
+				body = stand_in.name.encode('utf-8')
+				self.send_response(stand_in.status)
+				self.send_header('Content-Length', str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			def log_message(self, format, *args):
+				pass
+
+		self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+		self.server.daemon_threads = True
+		threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+	@property
+	def base_url(self):
+		return 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+
+	def close(self):
+		self.server.shutdown()
+		self.server.server_close()
+
+
+@pytest.fixture
+def stand_ins():
+	servers = []
+	def start(*args, **kwargs):
+		server = StandIn(*args, **kwargs)
+		servers.append(server)
+		return server
+	yield start
+	for server in servers:
+		server.close()
+
+
+@pytest.fixture(autouse=True)
+def short_hedge_delay(monkeypatch):
+	monkeypatch.setattr(wiki, 'HEDGE_DEFAULT_DELAY', 0.2)
+
+
+def test_slow_primary_is_hedged(stand_ins):
+	primary = stand_ins('primary', delay=2.0)
+	backup = stand_ins('backup')
+	client = wiki.MirrorClient([primary.base_url, backup.base_url])
+
+	start = time.monotonic()
+	response = client.get('/api.php?action=cargoquery')
+	assert response.text == 'backup'
+	assert time.monotonic() - start < 1.5
+	assert primary.paths == backup.paths == ['/api.php?action=cargoquery']
+
+
+def test_failing_primary_fails_over(stand_ins):
+	primary = stand_ins('primary', status=503)
+	backup = stand_ins('backup')
+	client = wiki.MirrorClient([primary.base_url, backup.base_url])
+
+	assert client.get('/Some_Page').text == 'backup'
+	assert client.endpoints[0].failures == 1
+	assert client.ranked_endpoints()[0].base_url == backup.base_url
+
+
+def test_all_mirrors_failing_raise(stand_ins):
+	first = stand_ins('first', status=500)
+	second = stand_ins('second', status=404)
+	client = wiki.MirrorClient([first.base_url, second.base_url])
+
+	with pytest.raises(requests.HTTPError):
+		client.get('/api.php?action=cargoquery')
+	assert len(first.paths) == len(second.paths) == 1
+
+
+def test_paths_follow_the_layout_of_each_mirror(stand_ins):
+	mirror = stand_ins('mirror')
+	client = wiki.MirrorClient([mirror.base_url + '|/w/api.php|/wiki/$1'])
+
+	client.get('/api.php?action=cargoquery&format=json')
+	client.get('/Spider_Lair_Map_(War_for_the_Atlas)')
+	assert mirror.paths == ['/w/api.php?action=cargoquery&format=json', '/wiki/Spider_Lair_Map_(War_for_the_Atlas)']
+	assert client.url('/User:ARTyficial/MapData') == mirror.base_url + '/wiki/User:ARTyficial/MapData'
+
+
+def test_empty_fields_of_a_mirror_keep_their_position():
+	endpoint = wiki.Endpoint.parse('http://x||/wiki/$1')
+	assert (endpoint.base_url, endpoint.api_path, endpoint.article_path) == ('http://x', '/api.php', '/wiki/$1')
+	endpoint = wiki.Endpoint.parse('http://x|/w/api.php|')
+	assert (endpoint.api_path, endpoint.article_path) == ('/w/api.php', '/$1')
+	endpoint = wiki.Endpoint.parse('http://x/')
+	assert (endpoint.base_url, endpoint.api_path, endpoint.article_path) == ('http://x', '/api.php', '/$1')